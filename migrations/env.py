@@ -21,8 +21,26 @@ if config.config_file_name is not None:
 target_metadata = table_registry.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # tabelas FTS5 (sqlite) e índices pg_trgm (postgres) da busca por
+    # substring são criados à mão nas migrations, por dialeto
+    if type_ == "table" and "_fts" in name:
+        return False
+    if type_ == "index" and name.endswith("_trgm"):
+        return context.get_bind().dialect.name == "postgresql"
+    # índices de prefixo (`COLLATE "C"`, só postgres): a reflexão não traz
+    # a collation da expressão e sempre acusaria diferença
+    if type_ == "index" and name.endswith("_prefix"):
+        return False
+    return True
+
+
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
     with context.begin_transaction():
         context.run_migrations()
 
@@ -45,6 +63,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
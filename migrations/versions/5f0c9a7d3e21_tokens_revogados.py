@@ -0,0 +1,42 @@
+"""tokens revogados
+
+Revision ID: 5f0c9a7d3e21
+Revises: 2232b9f071a3
+Create Date: 2026-10-18 09:12:40.118503
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c9a7d3e21"
+down_revision: Union[str, Sequence[str], None] = "2232b9f071a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index(
+        op.f("ix_revoked_tokens_expires_at"),
+        "revoked_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_revoked_tokens_expires_at"), table_name="revoked_tokens"
+    )
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,29 @@
+"""indice ordenacao titulo
+
+Revision ID: a6c3e8d0f417
+Revises: d91c4a7b2e05
+Create Date: 2026-10-18 17:42:10.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c3e8d0f417"
+down_revision: Union[str, Sequence[str], None] = "d91c4a7b2e05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_books_title_id", "books", ["title", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_books_title_id", table_name="books")
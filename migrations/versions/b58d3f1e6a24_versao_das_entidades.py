@@ -0,0 +1,83 @@
+"""versao das entidades
+
+Revision ID: b58d3f1e6a24
+Revises: f2a9c5d81e67
+Create Date: 2026-10-18 14:02:11.518430
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b58d3f1e6a24"
+down_revision: Union[str, Sequence[str], None] = "f2a9c5d81e67"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = [("books", "title"), ("novelists", "name")]
+
+
+def _sqlite_fts_triggers(table: str, column: str) -> list[str]:
+    # somem quando o sqlite recria a tabela
+    fts = f"{table}_fts"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column});"
+    )
+    insert_new = (
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});"
+    )
+    return [
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, column in SEARCH_COLUMNS:
+        # o sqlite não aceita `ADD COLUMN` com default não constante
+        with op.batch_alter_table(
+            table, recreate="always" if sqlite else "auto"
+        ) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "version",
+                    sa.Integer(),
+                    server_default="1",
+                    nullable=False,
+                )
+            )
+            batch_op.add_column(
+                sa.Column(
+                    "updated_at",
+                    sa.DateTime(timezone=True),
+                    server_default=sa.func.now(),
+                    nullable=False,
+                )
+            )
+        if sqlite:
+            for statement in _sqlite_fts_triggers(table, column):
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, column in SEARCH_COLUMNS:
+        with op.batch_alter_table(
+            table, recreate="always" if sqlite else "auto"
+        ) as batch_op:
+            batch_op.drop_column("updated_at")
+            batch_op.drop_column("version")
+        if sqlite:
+            for statement in _sqlite_fts_triggers(table, column):
+                op.execute(statement)
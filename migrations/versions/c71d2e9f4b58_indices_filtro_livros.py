@@ -0,0 +1,34 @@
+"""indices filtro livros
+
+Revision ID: c71d2e9f4b58
+Revises: a3e8b1c47d90
+Create Date: 2026-10-18 11:04:52.913377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71d2e9f4b58"
+down_revision: Union[str, Sequence[str], None] = "a3e8b1c47d90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_books_novelist_id_year",
+        "books",
+        ["novelist_id", "year"],
+        unique=False,
+    )
+    op.create_index("ix_books_year_id", "books", ["year", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_books_year_id", table_name="books")
+    op.drop_index("ix_books_novelist_id_year", table_name="books")
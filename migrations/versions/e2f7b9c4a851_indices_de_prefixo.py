@@ -0,0 +1,43 @@
+"""indices de prefixo
+
+Revision ID: e2f7b9c4a851
+Revises: a6c3e8d0f417
+Create Date: 2026-10-18 18:55:31.207348
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f7b9c4a851"
+down_revision: Union[str, Sequence[str], None] = "a6c3e8d0f417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # no sqlite o prefixo usa `ix_books_title_id` e o índice único de `name`
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_index(
+        "ix_books_title_prefix",
+        "books",
+        [sa.text('title COLLATE "C"'), "id"],
+    )
+    op.create_index(
+        "ix_novelists_name_prefix",
+        "novelists",
+        [sa.text('name COLLATE "C"')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_novelists_name_prefix", table_name="novelists")
+    op.drop_index("ix_books_title_prefix", table_name="books")
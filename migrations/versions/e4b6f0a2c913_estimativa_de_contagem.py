@@ -0,0 +1,43 @@
+"""estimativa de contagem
+
+Revision ID: e4b6f0a2c913
+Revises: c71d2e9f4b58
+Create Date: 2026-10-18 11:47:21.550934
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b6f0a2c913"
+down_revision: Union[str, Sequence[str], None] = "c71d2e9f4b58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION count_estimate(query text) RETURNS bigint
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            plan jsonb;
+        BEGIN
+            EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+            RETURN (plan -> 0 -> 'Plan' ->> 'Plan Rows')::bigint;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP FUNCTION IF EXISTS count_estimate(text)")
@@ -0,0 +1,84 @@
+"""cascade livros do romancista
+
+Revision ID: f2a9c5d81e67
+Revises: e4b6f0a2c913
+Create Date: 2026-10-18 12:26:40.071842
+
+"""
+
+from typing import Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a9c5d81e67"
+down_revision: Union[str, Sequence[str], None] = "e4b6f0a2c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_NAME = "books_novelist_id_fkey"
+
+# triggers da tabela FTS5 de `books` (somem quando o sqlite recria a tabela)
+FTS_DELETE = (
+    "INSERT INTO books_fts(books_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title);"
+)
+FTS_INSERT = "INSERT INTO books_fts(rowid, title) VALUES (new.id, new.title);"
+FTS_TRIGGERS = [
+    "CREATE TRIGGER books_fts_ai AFTER INSERT ON books "
+    f"BEGIN {FTS_INSERT} END",
+    "CREATE TRIGGER books_fts_ad AFTER DELETE ON books "
+    f"BEGIN {FTS_DELETE} END",
+    "CREATE TRIGGER books_fts_au AFTER UPDATE OF title ON books "
+    f"BEGIN {FTS_DELETE} {FTS_INSERT} END",
+]
+
+
+def _books_table(ondelete: Optional[str]) -> sa.Table:
+    books = sa.Table(
+        "books",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("novelist_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["novelist_id"], ["novelists.id"], name=FK_NAME, ondelete=ondelete
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    sa.Index("ix_books_novelist_id_year", books.c.novelist_id, books.c.year)
+    sa.Index("ix_books_year_id", books.c.year, books.c.id)
+    return books
+
+
+def _set_ondelete(ondelete: Optional[str]) -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # o sqlite não altera constraints: a tabela é recriada e copiada
+        with op.batch_alter_table(
+            "books", copy_from=_books_table(ondelete), recreate="always"
+        ):
+            pass
+        for statement in FTS_TRIGGERS:
+            op.execute(statement)
+        return
+    op.drop_constraint(FK_NAME, "books", type_="foreignkey")
+    op.create_foreign_key(
+        FK_NAME,
+        "books",
+        "novelists",
+        ["novelist_id"],
+        ["id"],
+        ondelete=ondelete,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _set_ondelete("CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_ondelete(None)
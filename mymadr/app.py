@@ -1,10 +1,22 @@
 import asyncio
 import sys
+from contextlib import asynccontextmanager, suppress
+from http import HTTPStatus
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 
-from mymadr.routers import accounts, books, novelist
+from mymadr.database import (
+    CONSISTENCY_HEADER,
+    consistency_token,
+    dispose_engines,
+    engine,
+    is_sqlite_file,
+    sqlite_maintenance,
+)
+from mymadr.routers import accounts, autocomplete, books, metrics, novelist
+from mymadr.security import password_pool
+from mymadr.settings import settings
 
 if sys.platform == "win32":  # pragma: no cover
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -13,15 +25,52 @@ tags_metadata = [
     {"name": "conta", "description": "Gerenciamento de contas"},
     {"name": "romancista", "description": "Gerenciamento de romancistas"},
     {"name": "livro", "description": "Gerenciamento de livros"},
+    {
+        "name": "autocompletar",
+        "description": "Sugestões por prefixo de nomes e títulos",
+    },
     {"name": "autenticacao", "description": "Autorizações"},
+    {"name": "metricas", "description": "Métricas internas da aplicação"},
 ]
 
 
-app = FastAPI(openapi_tags=tags_metadata)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    maintenance = None
+    if is_sqlite_file(settings.DATABASE_URL):  # pragma: no cover
+        maintenance = asyncio.create_task(
+            sqlite_maintenance(
+                engine, settings.SQLITE_OPTIMIZE_INTERVAL_SECONDS
+            )
+        )
+    yield
+    if maintenance:  # pragma: no cover
+        maintenance.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance
+    password_pool.shutdown()
+    await dispose_engines()
+
+
+app = FastAPI(openapi_tags=tags_metadata, lifespan=lifespan)
 
 app.include_router(novelist.router)
 app.include_router(books.router)
+app.include_router(autocomplete.router)
 app.include_router(accounts.router)
+app.include_router(metrics.router)
+
+
+@app.middleware("http")
+async def add_consistency_token(request: Request, call_next):
+    """Marca as escritas bem-sucedidas com o token de consistência, para
+    o cliente ler do primário enquanto as réplicas não alcançam."""
+    response = await call_next(request)
+    if request.method not in {"GET", "HEAD", "OPTIONS"} and (
+        response.status_code < HTTPStatus.BAD_REQUEST
+    ):
+        response.headers[CONSISTENCY_HEADER] = consistency_token()
+    return response
 
 
 @app.get("/", include_in_schema=False)
@@ -0,0 +1,163 @@
+from asyncio import Lock
+from bisect import bisect_left
+from functools import lru_cache
+from time import monotonic
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, bindparam, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.models import Book, Novelist
+from mymadr.settings import settings
+
+# maior caractere unicode: tudo que começa com `p` fica em [p, p + END)
+PREFIX_END = "\U0010ffff"
+
+# (texto, tipo, id): a ordem das sugestões, no banco e em memória
+Suggestion = tuple[str, str, int]
+
+# tipo da sugestão -> coluna de id e de texto (já sanitizado)
+SUGGESTION_SOURCES = {
+    "livro": (Book.id, Book.title),
+    "romancista": (Novelist.id, Novelist.name),
+}
+
+# carga do índice em memória: todos os nomes e títulos
+ALL_SUGGESTIONS = union_all(
+    *(
+        select(text_column, literal_column(f"'{kind}'"), id_column)
+        for kind, (id_column, text_column) in SUGGESTION_SOURCES.items()
+    )
+)
+
+
+def prefix_params(prefix: str, limit: int) -> dict:
+    return {
+        "prefix": prefix,
+        "prefix_end": prefix + PREFIX_END,
+        "limit": limit,
+    }
+
+
+@lru_cache(maxsize=4)
+def suggestions_query(dialect_name: str):
+    """Romancistas e livros cujo nome/título começa com `:prefix`.
+
+    O prefixo vira a faixa `texto >= :prefix AND texto < :prefix_end` na
+    ordem de bytes, a mesma do sqlite e do `str` do python: no postgres
+    com `COLLATE "C"` (índices `ix_*_prefix`). Cada tabela devolve as
+    `:limit` primeiras na ordem do índice, sem ordenar as demais.
+    """
+    branches = []
+    for kind, (id_column, column) in SUGGESTION_SOURCES.items():
+        text_column = (
+            column.collate("C") if dialect_name == "postgresql" else column
+        )
+        branch = (
+            select(
+                text_column.label("texto"),
+                literal_column(f"'{kind}'").label("tipo"),
+                id_column.label("id"),
+            )
+            .where(
+                text_column >= bindparam("prefix"),
+                text_column < bindparam("prefix_end"),
+            )
+            .order_by(text_column, id_column)
+            .limit(bindparam("limit", type_=Integer))
+        )
+        # o sqlite não aceita ORDER BY/LIMIT direto em cada ramo do UNION
+        branches.append(select(branch.subquery()))
+    return (
+        union_all(*branches)
+        .order_by("texto", "tipo", "id")
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+class PrefixIndex:
+    """Sugestões em uma lista ordenada por `(texto, tipo, id)`.
+
+    Tudo que começa com um prefixo é uma faixa contígua da lista, achada
+    por busca binária: O(log n + k), como descer em uma trie, mas com uma
+    tupla por entrada em vez de um nó por caractere.
+    """
+
+    def __init__(self, entries: Iterable[Suggestion] = ()):
+        self._entries = sorted(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, prefix: str, limit: int) -> list[Suggestion]:
+        start = bisect_left(self._entries, (prefix,))
+        end = bisect_left(self._entries, (prefix + PREFIX_END,), lo=start)
+        return self._entries[start : min(end, start + limit)]
+
+
+class SuggestionIndex:
+    """`PrefixIndex` de todos os nomes e títulos, para `/autocompletar`.
+
+    Carregado do banco na primeira busca depois de `invalidate()`, chamado
+    pelas escritas de livros e romancistas, e a cada `refresh_seconds`,
+    o que também traz as escritas feitas por outros processos.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._index = PrefixIndex()
+        self._loaded_at: Optional[float] = None
+        self._invalidated_at = float("-inf")
+        self._lock = Lock()
+        self.searches = 0
+        self.loads = 0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            # uma escrita durante a carga deixa o índice velho
+            and self._loaded_at > self._invalidated_at
+            and monotonic() - self._loaded_at < self.refresh_seconds
+        )
+
+    async def _ensure_loaded(self, session: AsyncSession):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():  # outra requisição já recarregou
+                return
+            loaded_at = monotonic()
+            rows = await session.execute(ALL_SUGGESTIONS)
+            self._index = PrefixIndex(tuple(row) for row in rows)
+            self._loaded_at = loaded_at
+            self.loads += 1
+
+    async def search(
+        self, session: AsyncSession, prefix: str, limit: int
+    ) -> list[Suggestion]:
+        await self._ensure_loaded(session)
+        self.searches += 1
+        return self._index.search(prefix, limit)
+
+    def invalidate(self):
+        self._invalidated_at = monotonic()
+
+    def clear(self):
+        self._index = PrefixIndex()
+        self._loaded_at = None
+        self._invalidated_at = float("-inf")
+        self._lock = Lock()
+        self.searches = 0
+        self.loads = 0
+
+    def stats(self) -> dict:
+        return {
+            "entradas": len(self._index),
+            "buscas": self.searches,
+            "recargas": self.loads,
+        }
+
+
+suggestion_index = SuggestionIndex(
+    refresh_seconds=settings.AUTOCOMPLETE_REFRESH_SECONDS
+)
@@ -0,0 +1,125 @@
+from typing import Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.messages import ResponseMessage
+from mymadr.models import Book, Novelist
+from mymadr.schemas import BookBatchItem
+
+# linhas por INSERT multi-linha (respeita o limite de parâmetros do banco)
+CHUNK_SIZE = 1000
+
+
+def _chunks(items: Sequence, size: int = CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _insert(session: AsyncSession, model):
+    """`INSERT` do dialeto da sessão, com suporte a `ON CONFLICT`."""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+async def get_or_create_novelists(
+    session: AsyncSession, names: Sequence[str]
+) -> dict[str, tuple[int, bool]]:
+    """`{nome: (id, criado)}` para os nomes (já sanitizados) informados.
+
+    Insere os nomes novos com `INSERT ... ON CONFLICT DO NOTHING
+    RETURNING` e busca os que já existiam; não faz commit.
+    """
+    unique_names = list(dict.fromkeys(names))
+    found: dict[str, tuple[int, bool]] = {}
+    for chunk in _chunks(unique_names):
+        created = await session.execute(
+            _insert(session, Novelist)
+            .values([{"name": name} for name in chunk])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Novelist.id, Novelist.name)
+        )
+        found.update({name: (id_, True) for id_, name in created})
+        missing = [name for name in chunk if name not in found]
+        if missing:
+            existing = await session.execute(
+                select(Novelist.id, Novelist.name).where(
+                    Novelist.name.in_(missing)
+                )
+            )
+            found.update({name: (id_, False) for id_, name in existing})
+    return found
+
+
+async def create_novelists(
+    session: AsyncSession, names: Sequence[str]
+) -> list[dict]:
+    novelists = await get_or_create_novelists(session, names)
+    await session.commit()
+    results, seen = [], set()
+    for index, name in enumerate(names):
+        novelist_id, created = novelists[name]
+        results.append({
+            "indice": index,
+            "id": novelist_id,
+            "status": "criado"
+            if created and name not in seen
+            else "existente",
+        })
+        seen.add(name)
+    return results
+
+
+async def create_books(
+    session: AsyncSession, items: Sequence[BookBatchItem]
+) -> list[dict]:
+    """Cadastra os livros em uma transação; itens que apontam para um
+    `romancista_id` inexistente voltam com `status` "erro"."""
+    novelists = await get_or_create_novelists(
+        session, [item.novelist_name for item in items if item.novelist_name]
+    )
+    ids = {item.novelist_id for item in items if item.novelist_id}
+    known_ids = set()
+    for chunk in _chunks(list(ids)):
+        known_ids.update(
+            await session.scalars(
+                select(Novelist.id).where(Novelist.id.in_(chunk))
+            )
+        )
+
+    results: list[dict] = []
+    rows, row_results = [], []
+    for index, item in enumerate(items):
+        novelist_id = (
+            novelists[item.novelist_name][0]
+            if item.novelist_name
+            else item.novelist_id
+        )
+        if novelist_id not in known_ids and not item.novelist_name:
+            results.append({
+                "indice": index,
+                "id": None,
+                "status": "erro",
+                "mensagem": ResponseMessage.NOVELIST_NOT_FOUND,
+            })
+            continue
+        result = {"indice": index, "id": None, "status": "criado"}
+        results.append(result)
+        row_results.append(result)
+        rows.append({
+            "title": item.title,
+            "year": item.year,
+            "novelist_id": novelist_id,
+        })
+
+    if rows:
+        book_ids = await session.scalars(
+            insert(Book).returning(Book.id, sort_by_parameter_order=True),
+            rows,
+        )
+        for result, book_id in zip(row_results, book_ids):
+            result["id"] = book_id
+    await session.commit()
+    return results
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional, Protocol
+
+from mymadr.settings import settings
+
+
+class TTLCache:
+    """Cache LRU em memória com tempo de vida (TTL) por entrada.
+
+    `ttl <= 0` ou `maxsize <= 0` desligam o cache: toda leitura é um miss.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def invalidate_all(self):
+        """Descarta as entradas, mantendo os contadores."""
+        self._data.clear()
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "tamanho": len(self._data),
+            "capacidade": self.maxsize,
+            "acertos": self.hits,
+            "falhas": self.misses,
+            "taxa_acerto": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CacheBackend(Protocol):
+    """Interface dos caches de entidades.
+
+    Assíncrona para permitir um backend compartilhado (Redis, memcached)
+    no lugar do cache em memória sem mudar os routers.
+    """
+
+    async def get(self, key: Hashable) -> Optional[Any]: ...
+
+    async def set(self, key: Hashable, value: Any): ...
+
+    async def invalidate(self, key: Hashable): ...
+
+    async def invalidate_all(self): ...
+
+    def clear(self): ...
+
+    def stats(self) -> dict: ...
+
+
+class MemoryCacheBackend:
+    """`CacheBackend` local ao processo, sobre um `TTLCache`."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: Hashable, value: Any):
+        self._cache.set(key, value)
+
+    async def invalidate(self, key: Hashable):
+        self._cache.invalidate(key)
+
+    async def invalidate_all(self):
+        self._cache.invalidate_all()
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# representações públicas (`BookPublic`/`NovelistPublic`) por id
+book_cache: CacheBackend = MemoryCacheBackend(
+    maxsize=settings.ENTITY_CACHE_MAX_SIZE,
+    ttl=settings.ENTITY_CACHE_TTL_SECONDS,
+)
+novelist_cache: CacheBackend = MemoryCacheBackend(
+    maxsize=settings.ENTITY_CACHE_MAX_SIZE,
+    ttl=settings.ENTITY_CACHE_TTL_SECONDS,
+)
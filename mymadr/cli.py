@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+from itertools import product
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+MIN_MEMORY_COST = 8 * 1024  # KiB
+MAX_TIME_COST = 20
+
+
+# --- calibração do argon2 ---
+def benchmark_argon2(
+    time_cost: int, memory_cost: int, parallelism: int, rounds: int = 3
+) -> float:
+    """Mediana, em ms, de `rounds` hashes com os parâmetros informados."""
+    hasher = Argon2Hasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    timings = []
+    for _ in range(rounds):
+        started = perf_counter()
+        hasher.hash("calibracao-argon2")
+        timings.append((perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def calibrate_argon2(
+    target_ms: float,
+    memory_cost: int,
+    parallelism: int,
+    bench: Callable[[int, int, int], float] = benchmark_argon2,
+) -> dict[str, int]:
+    """Maior custo de tempo que cabe em `target_ms` nesta máquina.
+
+    Se nem `time_cost=1` cabe no alvo, reduz a memória pela metade até
+    `MIN_MEMORY_COST`.
+    """
+    while (
+        memory_cost > MIN_MEMORY_COST
+        and bench(1, memory_cost, parallelism) > target_ms
+    ):
+        memory_cost //= 2
+    time_cost = 1
+    while (
+        time_cost < MAX_TIME_COST
+        and bench(time_cost + 1, memory_cost, parallelism) <= target_ms
+    ):
+        time_cost += 1
+    return {
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism,
+    }
+
+
+def write_env(path: Path, values: dict[str, int]):
+    """Atualiza (ou acrescenta) as chaves em um arquivo `.env`."""
+    lines = (
+        path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    )
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            lines[i] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in pending.items())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def calibrar_argon2(args: argparse.Namespace):
+    params = calibrate_argon2(args.alvo_ms, args.memoria_kib, args.paralelismo)
+    latency = benchmark_argon2(
+        params["ARGON2_TIME_COST"],
+        params["ARGON2_MEMORY_COST"],
+        params["ARGON2_PARALLELISM"],
+    )
+    for key, value in params.items():
+        print(f"{key}={value}")
+    print(f"# latência medida: {latency:.1f} ms (alvo {args.alvo_ms} ms)")
+    if not args.nao_gravar:
+        write_env(Path(args.env_file), params)
+        print(f"# parâmetros gravados em {args.env_file}")
+
+
+# --- benchmark dos filtros de livros ---
+# a aplicação (e o `Settings`) só é importada dentro das funções, para
+# que `calibrar-argon2` continue rodando sem `.env`
+# (titulo, ano, romancista_id): as 8 combinações aceitas por `query_books`
+FILTER_COMBINATIONS = list(product([False, True], repeat=3))
+FILTER_VALUES = {"title": "a", "year": 2000, "novelist_id": 1}
+
+
+def _adhoc_books_query(
+    dialect_name: str, title: bool, year: bool, novel: bool
+):
+    """Consulta montada a cada chamada, como `query_books` fazia antes."""
+    from mymadr.models import Book  # noqa: PLC0415
+    from mymadr.search import books_fts, substring_filter  # noqa: PLC0415
+
+    query = select(Book)
+    if title:
+        query = query.filter(
+            substring_filter(
+                dialect_name,
+                Book.title,
+                books_fts.c.title,
+                Book.id,
+                FILTER_VALUES["title"],
+            )
+        )
+    if year:
+        query = query.filter(Book.year == FILTER_VALUES["year"])
+    if novel:
+        query = query.filter(Book.novelist_id == FILTER_VALUES["novelist_id"])
+    return query.order_by(Book.id).limit(21), None
+
+
+def _cached_books_query(
+    dialect_name: str, title: bool, year: bool, novel: bool
+):
+    """Formato em cache com `bindparam`, como `query_books` faz agora."""
+    from mymadr.pagination import page_params, paginate  # noqa: PLC0415
+    from mymadr.routers.books import BOOK_ORDER, books_query  # noqa: PLC0415
+    from mymadr.search import search_mode, substring_pattern  # noqa: PLC0415
+
+    params = page_params(BOOK_ORDER, None, 20)
+    mode = search_mode(dialect_name, FILTER_VALUES["title"]) if title else None
+    if mode:
+        params["title"] = substring_pattern(mode, FILTER_VALUES["title"])
+    filters = [
+        name for name, on in (("year", year), ("novelist_id", novel)) if on
+    ]
+    params.update({name: FILTER_VALUES[name] for name in filters})
+    query = books_query(mode, frozenset(filters))
+    return paginate(query, BOOK_ORDER, False), params
+
+
+async def benchmark_filters(url: str, rounds: int) -> dict[str, float]:
+    """Mediana, em ms, de uma consulta de livros em cada modo:
+
+    - `sem_cache`: consulta montada a cada chamada, sem cache de compilação
+      e sem prepared statements (psycopg);
+    - `com_cache`: formatos em cache, cache de compilação do SQLAlchemy e
+      `prepare_threshold` de `Settings`.
+    """
+    from mymadr.database import prepare_connect_args  # noqa: PLC0415
+    from mymadr.settings import settings  # noqa: PLC0415
+
+    modes = {
+        "sem_cache": (_adhoc_books_query, 0, None),
+        "com_cache": (_cached_books_query, 500, settings.DB_PREPARE_THRESHOLD),
+    }
+    results = {}
+    for mode, (build, cache_size, threshold) in modes.items():
+        engine = create_async_engine(
+            url,
+            query_cache_size=cache_size,
+            connect_args=prepare_connect_args(url, threshold),
+        )
+        timings = []
+        async with AsyncSession(engine) as session:
+            dialect_name = engine.dialect.name
+            for _ in range(rounds):
+                for title, year, novel in FILTER_COMBINATIONS:
+                    started = perf_counter()
+                    query, params = build(dialect_name, title, year, novel)
+                    result = await session.scalars(query, params)
+                    result.all()
+                    timings.append((perf_counter() - started) * 1000)
+        await engine.dispose()
+        results[mode] = median(timings)
+    return results
+
+
+def benchmark_filtros(args: argparse.Namespace):
+    from mymadr.settings import settings  # noqa: PLC0415
+
+    url = args.url or settings.DATABASE_URL
+    results = asyncio.run(benchmark_filters(url, args.rodadas))
+    for mode, latency in results.items():
+        print(f"{mode}: {latency:.3f} ms por consulta (mediana)")
+
+
+# --- reparo das estatísticas dos romancistas ---
+async def recompute_stats(url: str) -> int:
+    """Recalcula `book_count`/`first_year`/`last_year` de todos os
+    romancistas a partir de `books`; devolve quantos foram atualizados."""
+    from mymadr.stats import RECOMPUTE_NOVELIST_STATS  # noqa: PLC0415
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        result = await conn.execute(text(RECOMPUTE_NOVELIST_STATS))
+    await engine.dispose()
+    return result.rowcount
+
+
+def recalcular_estatisticas(args: argparse.Namespace):
+    from mymadr.settings import settings  # noqa: PLC0415
+
+    updated = asyncio.run(recompute_stats(args.url or settings.DATABASE_URL))
+    print(f"{updated} romancistas recalculados")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m mymadr.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    argon2 = commands.add_parser(
+        "calibrar-argon2",
+        help="mede o argon2 nesta máquina e grava os parâmetros no .env",
+    )
+    argon2.add_argument("--alvo-ms", type=float, default=250)
+    argon2.add_argument("--memoria-kib", type=int, default=65536)
+    argon2.add_argument("--paralelismo", type=int, default=4)
+    argon2.add_argument("--env-file", default=".env")
+    argon2.add_argument("--nao-gravar", action="store_true")
+    argon2.set_defaults(handler=calibrar_argon2)
+
+    filters = commands.add_parser(
+        "benchmark-filtros",
+        help="compara as consultas de livros com e sem cache de formatos",
+    )
+    filters.add_argument("--url", default=None)
+    filters.add_argument("--rodadas", type=int, default=200)
+    filters.set_defaults(handler=benchmark_filtros)
+
+    stats = commands.add_parser(
+        "recalcular-estatisticas",
+        help="recalcula total de livros e anos de cada romancista",
+    )
+    stats.add_argument("--url", default=None)
+    stats.set_defaults(handler=recalcular_estatisticas)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
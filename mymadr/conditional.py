@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from http import HTTPStatus
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+
+def entity_tag(entity_id: int, *versions: int) -> str:
+    return '"' + "-".join(map(str, [entity_id, *versions])) + '"'
+
+
+def list_tag(items: Iterable, *extra) -> str:
+    """ETag fraco de uma página: ids e versões dos itens, mais `extra`
+    (cursor e totais), que também mudam a resposta."""
+    parts = [(item.id, item.version) for item in items]
+    digest = blake2b(repr((parts, extra)).encode(), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        # o sqlite devolve datetimes sem fuso, sempre em UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def entity_entry(schema: type[BaseModel], entity, *related) -> dict:
+    """Representação pública de `entity` com os seus validadores; é o que
+    fica no cache de entidades. As versões das entidades expandidas
+    (`related`) também entram nos validadores."""
+    body = schema.model_validate(entity, from_attributes=True)
+    entities = [entity, *related]
+    return {
+        "body": body.model_dump(by_alias=True),
+        "etag": entity_tag(entity.id, *(e.version for e in entities)),
+        "last_modified": http_date(max(e.updated_at for e in entities)),
+    }
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[str] = None
+) -> bool:
+    # `If-None-Match` tem precedência sobre `If-Modified-Since` (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # comparação fraca: `W/"x"` e `"x"` são a mesma versão
+        tags = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    since = _parse_http_date(if_modified_since)
+    return since is not None and _parse_http_date(last_modified) <= since
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[str] = None,
+) -> Optional[Response]:
+    """Coloca `ETag`/`Last-Modified` na resposta; se o cliente já tem essa
+    versão, devolve o `304` que a rota deve retornar no lugar do corpo."""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
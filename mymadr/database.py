@@ -1,10 +1,204 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+import logging
+from functools import partial
+from itertools import cycle
+from time import perf_counter, time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from mymadr.settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL)  # type: ignore
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool padrão do engine assíncrono, medindo a espera de cada checkout."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def prepare_connect_args(url: str, threshold: Optional[int]) -> dict:
+    """`connect_args` com o `prepare_threshold` do psycopg."""
+    if make_url(url).get_driver_name() != "psycopg":
+        return {}
+    return {"prepare_threshold": threshold}
+
+
+def build_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in {None, "", ":memory:"}:
+            # banco em memória usa um pool de conexão única (StaticPool)
+            return create_async_engine(url)
+        return _build_sqlite_engine(url, read_only)
+    return create_async_engine(
+        url,
+        connect_args=prepare_connect_args(url, settings.DB_PREPARE_THRESHOLD),
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+# --- perfil sqlite: WAL, um escritor e um pool de leitores ---
+def _build_sqlite_engine(url: str, read_only: bool) -> AsyncEngine:
+    sqlite_engine = create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.SQLITE_READ_POOL_SIZE if read_only else 1,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    event.listen(
+        sqlite_engine.sync_engine,
+        "connect",
+        partial(_set_sqlite_pragmas, read_only=read_only),
+    )
+    return sqlite_engine
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record, read_only):
+    pragmas = [
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "foreign_keys=ON",
+        "temp_store=MEMORY",
+        f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}",
+        f"mmap_size={settings.SQLITE_MMAP_SIZE}",
+    ]
+    if read_only:
+        pragmas.append("query_only=ON")
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in {
+        None,
+        "",
+        ":memory:",
+    }
+
+
+async def optimize_sqlite(sqlite_engine: AsyncEngine):
+    # `optimize` roda ANALYZE só nas tabelas que precisam
+    async with sqlite_engine.begin() as conn:
+        await conn.exec_driver_sql("PRAGMA optimize")
+
+
+async def sqlite_maintenance(sqlite_engine: AsyncEngine, interval: float):
+    while True:
+        try:
+            await optimize_sqlite(sqlite_engine)
+        except Exception:
+            # ex.: SQLITE_BUSY; a manutenção segue no próximo ciclo
+            logger.exception("PRAGMA optimize falhou")
+        await asyncio.sleep(interval)
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": type(pool).__name__}
+    checkouts = pool.checkouts or 1
+    return {
+        "pool": type(pool).__name__,
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "espera_media_ms": round(pool.wait_seconds / checkouts * 1000, 3),
+        "espera_maxima_ms": round(pool.max_wait_seconds * 1000, 3),
+    }
+
+
+engine = build_engine(settings.DATABASE_URL)
+replica_engines = [build_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+if not replica_engines and is_sqlite_file(settings.DATABASE_URL):
+    replica_engines = [build_engine(settings.DATABASE_URL, read_only=True)]
+_replicas = cycle(replica_engines)
+
+# enviado nas escritas e devolvido pelo cliente nas leituras seguintes
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+
+def consistency_token() -> str:
+    return f"{time():.6f}"
+
+
+def read_engine(token: Optional[str] = None) -> AsyncEngine:
+    """Engine para leitura: uma réplica, ou o primário quando o cliente
+    escreveu há menos de `REPLICA_MAX_LAG_SECONDS` (read-your-writes)."""
+    if not replica_engines:
+        return engine
+    if token is not None:
+        try:
+            written_at = float(token)
+        except ValueError:
+            return engine
+        # um token do futuro prenderia o cliente ao primário para sempre
+        if 0 <= time() - written_at < settings.REPLICA_MAX_LAG_SECONDS:
+            return engine
+    return next(_replicas)
+
+
+def may_lag(session: AsyncSession) -> bool:
+    """Se a sessão lê de uma réplica de `DATABASE_REPLICA_URLS`, que pode
+    estar atrás do primário: o que ela lê não deve encher os caches (o
+    pool de leitura do sqlite lê o mesmo arquivo e não atrasa)."""
+    return session.info.get("replica", False)
+
+
+async def dispose_engines():
+    for db_engine in [engine, *replica_engines]:
+        await db_engine.dispose()
 
 
 async def get_session():  # pragma: no cover
     async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def get_read_session(request: Request):  # pragma: no cover
+    token = request.headers.get(CONSISTENCY_HEADER)
+    db_engine = read_engine(token)
+    replica = db_engine is not engine and bool(settings.DATABASE_REPLICA_URLS)
+    async with AsyncSession(
+        db_engine, expire_on_commit=False, info={"replica": replica}
+    ) as session:
+        yield session
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.settings import settings
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _export_rows(session: AsyncSession, query: Select, fmt: str):
+    # `yield_per` usa cursor no servidor e busca `EXPORT_FETCH_SIZE` linhas
+    # por vez, então a memória não cresce com o tamanho da tabela
+    result = await session.stream(
+        query.execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+    )
+    columns = list(result.keys())
+    if fmt == "csv":
+        yield _csv_chunk([columns])
+    async for rows in result.partitions():
+        if fmt == "csv":
+            yield _csv_chunk(rows)
+        else:
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+
+
+def export_response(
+    session: AsyncSession, query: Select, fmt: ExportFormat, name: str
+) -> StreamingResponse:
+    """Exporta as linhas de `query` (colunas já com os nomes da API)."""
+    return StreamingResponse(
+        _export_rows(session, query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{fmt}"'
+        },
+    )
@@ -0,0 +1,74 @@
+from pathlib import Path
+from typing import Any, Optional
+
+from jwt.algorithms import get_default_algorithms
+
+ASYMMETRIC_ALGORITHMS = {"EdDSA", "ES256"}
+
+
+class SigningKeySet:
+    """Chaves usadas para assinar e verificar os tokens JWT.
+
+    Com algoritmos HMAC (HS256) usa o `SECRET_KEY`. Com EdDSA/ES256 as
+    chaves vêm de `keys_dir`: `<kid>.pem` são chaves privadas (podem
+    assinar) e `<kid>.pub.pem` são chaves públicas de chaves aposentadas,
+    aceitas só na verificação. A chave `active_kid` assina os novos tokens.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret_key: str,
+        keys_dir: Optional[str] = None,
+        active_kid: Optional[str] = None,
+    ):
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._secret_key = secret_key
+        self._private: dict[str, Any] = {}
+        self._public: dict[str, Any] = {}
+        if self.asymmetric:
+            self._load(Path(keys_dir or "keys"))
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def _load(self, keys_dir: Path):
+        jwt_algorithm = get_default_algorithms()[self.algorithm]
+        for path in sorted(keys_dir.glob("*.pem")):
+            pem = path.read_bytes()
+            if path.name.endswith(".pub.pem"):
+                kid = path.name.removesuffix(".pub.pem")
+                self._public[kid] = jwt_algorithm.prepare_key(pem)
+                continue
+            kid = path.name.removesuffix(".pem")
+            private_key = jwt_algorithm.prepare_key(pem)
+            self._private[kid] = private_key
+            self._public[kid] = private_key.public_key()
+        if self.active_kid not in self._private:
+            raise ValueError(
+                f"Chave ativa '{self.active_kid}' não encontrada em {keys_dir}"
+            )
+
+    def signing_key(self) -> tuple[Optional[str], Any]:
+        if not self.asymmetric:
+            return None, self._secret_key
+        return self.active_kid, self._private[self.active_kid]
+
+    def verification_key(self, kid: Optional[str]) -> Any:
+        """Chave pública do `kid`; `KeyError` se o `kid` for desconhecido."""
+        if not self.asymmetric:
+            return self._secret_key
+        return self._public[kid]
+
+    def jwks(self) -> dict:
+        if not self.asymmetric:
+            return {"keys": []}
+        jwt_algorithm = get_default_algorithms()[self.algorithm]
+        keys = []
+        for kid, public_key in self._public.items():
+            jwk = jwt_algorithm.to_jwk(public_key, as_dict=True)
+            jwk.update({"kid": kid, "alg": self.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
@@ -8,6 +8,9 @@ class ResponseMessage(str, Enum):
     ACCOUNT_DELETED_SUCCESS = "Conta deletada com sucesso"
     AUTH_INVALID_CREDENTIALS = "Email ou senha incorretos"
     AUTH_NOT_AUTHORIZED = "Não autorizado"
+    AUTH_SERVICE_BUSY = "Serviço sobrecarregado, tente novamente"
+    AUTH_TOO_MANY_ATTEMPTS = "Muitas tentativas de login, aguarde"
+    AUTH_LOGOUT_SUCCESS = "Sessão encerrada com sucesso"
 
     # book
     BOOK_NOT_FOUND = "Livro não consta no MADR"
@@ -20,3 +23,4 @@ class ResponseMessage(str, Enum):
 
     # data validation
     DATA_MISSING_FIELDS = "Pelo menos um campo deve ser fornecido"
+    PAGINATION_INVALID_CURSOR = "Cursor de paginação inválido"
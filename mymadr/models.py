@@ -1,9 +1,32 @@
-from sqlalchemy import ForeignKey
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, event, func, text
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
+from mymadr.pagination import COUNT_ESTIMATE_FUNCTION
+from mymadr.search import sqlite_fts_ddl
+from mymadr.stats import POSTGRES_STATS_DDL, SQLITE_STATS_DDL
+
 table_registry = registry()
 
 
+def _version_column() -> Mapped[int]:
+    # incrementada pelo próprio UPDATE; vira o ETag das respostas
+    return mapped_column(
+        init=False, server_default="1", onupdate=text("version + 1")
+    )
+
+
+def _updated_at_column() -> Mapped[datetime]:
+    return mapped_column(
+        DateTime(timezone=True),
+        init=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
 @table_registry.mapped_as_dataclass
 class Account:
     __tablename__ = "accounts"
@@ -17,11 +40,34 @@ class Account:
 @table_registry.mapped_as_dataclass
 class Book:
     __tablename__ = "books"
+    __table_args__ = (
+        # formatos de filtro do catálogo: por romancista (e ano) e por ano
+        Index("ix_books_novelist_id_year", "novelist_id", "year"),
+        Index("ix_books_year_id", "year", "id"),
+        # `ordenar=titulo` (e `-titulo`), com `id` de desempate; no sqlite
+        # também atende o prefixo de `/autocompletar`
+        Index("ix_books_title_id", "title", "id"),
+        # `/autocompletar` no postgres: ordem de bytes (como o sqlite e o
+        # `str` do python), em que `>= prefixo` é uma faixa do índice
+        Index("ix_books_title_prefix", text('title COLLATE "C"'), "id").ddl_if(
+            dialect="postgresql"
+        ),
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str] = mapped_column()
     year: Mapped[int] = mapped_column()
-    novelist_id: Mapped[int] = mapped_column(ForeignKey("novelists.id"))
+    novelist_id: Mapped[int] = mapped_column(
+        ForeignKey("novelists.id", ondelete="CASCADE")
+    )
+    version: Mapped[int] = _version_column()
+    updated_at: Mapped[datetime] = _updated_at_column()
     novelist: Mapped["Novelist"] = relationship(
         init=False,
         back_populates="books",
@@ -31,11 +77,88 @@ class Book:
 @table_registry.mapped_as_dataclass
 class Novelist:
     __tablename__ = "novelists"
+    __table_args__ = (
+        Index(
+            "ix_novelists_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_novelists_name_prefix", text('name COLLATE "C"')).ddl_if(
+            dialect="postgresql"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str] = mapped_column(unique=True)
+    version: Mapped[int] = _version_column()
+    updated_at: Mapped[datetime] = _updated_at_column()
+    # mantidos pelos triggers de `books` (mymadr/stats.py)
+    book_count: Mapped[int] = mapped_column(init=False, server_default="0")
+    first_year: Mapped[Optional[int]] = mapped_column(init=False, default=None)
+    last_year: Mapped[Optional[int]] = mapped_column(init=False, default=None)
     books: Mapped[list["Book"]] = relationship(
         init=False,
         back_populates="novelist",
         cascade="all, delete-orphan",
+        # os livros são apagados pelo `ON DELETE CASCADE` do banco
+        passive_deletes=True,
     )
+
+
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+
+
+# --- busca por substring: pg_trgm no postgres, FTS5 no sqlite ---
+event.listen(
+    table_registry.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql"
+    ),
+)
+for _table, _column in [
+    (Book.__table__, "title"),
+    (Novelist.__table__, "name"),
+]:
+    for _statement in sqlite_fts_ddl(_table.name, _column):
+        event.listen(
+            _table,
+            "after_create",
+            DDL(_statement).execute_if(dialect="sqlite"),
+        )
+    event.listen(
+        _table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_table.name}_fts").execute_if(
+            dialect="sqlite"
+        ),
+    )
+
+
+# --- estimativa de totais das listagens (postgres) ---
+event.listen(
+    table_registry.metadata,
+    "after_create",
+    DDL(COUNT_ESTIMATE_FUNCTION).execute_if(dialect="postgresql"),
+)
+
+
+# --- estatísticas dos romancistas ---
+for _dialect, _statements in [
+    ("postgresql", POSTGRES_STATS_DDL),
+    ("sqlite", SQLITE_STATS_DDL),
+]:
+    for _statement in _statements:
+        event.listen(
+            Book.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
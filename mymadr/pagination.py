@@ -0,0 +1,203 @@
+import base64
+import json
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Any, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    and_,
+    bindparam,
+    case,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from mymadr.messages import ResponseMessage
+
+# estimativa de linhas do planejador para uma consulta (postgres)
+COUNT_ESTIMATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION count_estimate(query text) RETURNS bigint
+LANGUAGE plpgsql AS $$
+DECLARE
+    plan jsonb;
+BEGIN
+    EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+    RETURN (plan -> 0 -> 'Plan' ->> 'Plan Rows')::bigint;
+END
+$$
+"""
+
+
+class SortKey(NamedTuple):
+    column: InstrumentedAttribute
+    descending: bool = False
+
+
+def sort_keys(
+    order: Optional[str],
+    columns: dict[str, InstrumentedAttribute],
+    tiebreaker: InstrumentedAttribute,
+) -> tuple[SortKey, ...]:
+    """Chaves do keyset para `ordenar=ano,-titulo` (já validado contra
+    `columns`). Se a última chave não é única, `tiebreaker` fecha a ordem,
+    na mesma direção dela."""
+    if not order:
+        return (SortKey(tiebreaker),)
+    keys = [
+        SortKey(columns[field.removeprefix("-")], field.startswith("-"))
+        for field in order.split(",")
+    ]
+    last = keys[-1]
+    if not (last.column.primary_key or last.column.unique):
+        keys.append(SortKey(tiebreaker, last.descending))
+    return tuple(keys)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> list[Any]:
+    """Valores do último item da página anterior, validados contra `keys`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(keys)
+        or not all(
+            isinstance(value, key.column.type.python_type)
+            for key, value in zip(keys, values)
+        )
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=ResponseMessage.PAGINATION_INVALID_CURSOR,
+        )
+    return values
+
+
+def keyset_after(
+    keys: Sequence[SortKey], values: Sequence[Any]
+) -> ColumnElement[bool]:
+    """Predicado "vem depois de `values`" na ordem definida por `keys`."""
+    if len({key.descending for key in keys}) == 1:
+        # mesma direção: comparação de tupla, atendida direto pelo índice
+        columns = tuple_(*(key.column for key in keys))
+        bound = tuple_(*values)
+        return columns < bound if keys[0].descending else columns > bound
+    # direções mistas: (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, key in enumerate(keys):
+        ties = [keys[j].column == values[j] for j in range(i)]
+        step = (
+            key.column < values[i]
+            if key.descending
+            else key.column > values[i]
+        )
+        clauses.append(and_(*ties, step))
+    return or_(*clauses)
+
+
+@lru_cache(maxsize=256)
+def paginate(
+    query: Select, keys: Sequence[SortKey], with_cursor: bool
+) -> Select:
+    """Ordena por `keys`, continua depois do cursor e busca um item a mais
+    (`limit = tamanho + 1`) para saber se existe uma próxima página.
+
+    Cursor e limite entram como `bindparam` (valores em `page_params`),
+    então o formato da consulta é montado e compilado uma vez só.
+    """
+    if with_cursor:
+        query = query.where(
+            keyset_after(
+                keys,
+                [
+                    bindparam(f"cursor_{i}", type_=key.column.type)
+                    for i, key in enumerate(keys)
+                ],
+            )
+        )
+    order_by = [
+        key.column.desc() if key.descending else key.column.asc()
+        for key in keys
+    ]
+    return query.order_by(*order_by).limit(bindparam("limit", type_=Integer))
+
+
+def page_params(
+    keys: Sequence[SortKey], cursor: Optional[str], size: int
+) -> dict[str, Any]:
+    params: dict[str, Any] = {"limit": size + 1}
+    if cursor is not None:
+        values = decode_cursor(cursor, keys)
+        params.update({f"cursor_{i}": value for i, value in enumerate(values)})
+    return params
+
+
+def page(
+    items_key: str, rows: Sequence[Any], keys: Sequence[SortKey], size: int
+) -> dict:
+    """Corpo da resposta: os `size` primeiros itens e o cursor seguinte."""
+    items = list(rows[:size])
+    next_cursor = None
+    if len(rows) > size:
+        last = items[-1]
+        next_cursor = encode_cursor([
+            getattr(last, key.column.key) for key in keys
+        ])
+    return {
+        items_key: items,
+        "proximo": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+async def count_total(
+    session: AsyncSession,
+    query: Select,
+    threshold: int,
+    params: Optional[dict[str, Any]] = None,
+) -> dict:
+    """Total de itens de `query` em uma única consulta extra.
+
+    Conta no máximo `threshold + 1` linhas: até `threshold` o total é
+    exato. Acima disso, no postgres, vem da estimativa do planejador
+    (`count_estimate`); nos demais bancos é o limite inferior
+    `threshold + 1`. Em ambos os casos `total_estimado` é verdadeiro.
+    """
+    bounded = (
+        query
+        .with_only_columns(literal_column("1"), maintain_column_froms=True)
+        .order_by(None)
+        .limit(threshold + 1)
+        .subquery()
+    )
+    counted = select(func.count().label("n")).select_from(bounded).subquery()
+    over = counted.c.n > threshold
+    total = counted.c.n
+    dialect = session.bind.dialect
+    if dialect.name == "postgresql":
+        filtered = query.params(params or {}).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        total = case(
+            (over, func.count_estimate(literal(str(filtered)))),
+            else_=counted.c.n,
+        )
+    row = (await session.execute(select(total, over), params)).one()
+    return {"total": row[0], "total_estimado": row[1]}
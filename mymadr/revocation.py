@@ -0,0 +1,123 @@
+import math
+from datetime import datetime
+from hashlib import blake2b
+from time import monotonic
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.models import RevokedToken
+from mymadr.settings import settings
+
+
+class BloomFilter:
+    """Bloom filter simples: nunca dá falso negativo, só falso positivo."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.num_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, item: str):
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos // 8] |= 1 << (pos % 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[pos // 8] & (1 << (pos % 8))
+            for pos in self._positions(item)
+        )
+
+
+class RevocationList:
+    """Lista de tokens revogados (`jti`) com um Bloom filter na frente.
+
+    A tabela `revoked_tokens` só é consultada quando o filtro acusa um
+    possível `jti` revogado; o filtro é recarregado do banco a cada
+    `refresh_seconds`, o que também propaga revogações de outras réplicas.
+    """
+
+    def __init__(
+        self, capacity: int, error_rate: float, refresh_seconds: float
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._loaded_at: Optional[float] = None
+        self.checks = 0
+        self.lookups = 0
+
+    async def _ensure_loaded(self, session: AsyncSession):
+        now = monotonic()
+        if (
+            self._loaded_at is not None
+            and now - self._loaded_at < self.refresh_seconds
+        ):
+            return
+        jtis = await session.scalars(
+            select(RevokedToken.jti).where(RevokedToken.expires_at > _now())
+        )
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._loaded_at = now
+
+    async def is_revoked(self, session: AsyncSession, jti: str) -> bool:
+        await self._ensure_loaded(session)
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.lookups += 1
+        revoked = await session.scalar(
+            select(RevokedToken.jti).where(RevokedToken.jti == jti)
+        )
+        return revoked is not None
+
+    async def revoke(
+        self, session: AsyncSession, jti: str, expires_at: datetime
+    ):
+        # aproveita a escrita para podar o que já expirou
+        await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= _now())
+        )
+        session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        await session.commit()
+        self._bloom.add(jti)
+
+    def clear(self):
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._loaded_at = None
+        self.checks = 0
+        self.lookups = 0
+
+    def stats(self) -> dict:
+        return {
+            "verificacoes": self.checks,
+            "consultas_banco": self.lookups,
+            "bits_filtro": self._bloom.size,
+        }
+
+
+def _now() -> datetime:
+    return datetime.now(tz=ZoneInfo("UTC"))
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+)
@@ -1,22 +1,29 @@
+from datetime import datetime
 from http import HTTPStatus
 from typing import Annotated
+from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from mymadr.database import get_session
 from mymadr.messages import ResponseMessage
 from mymadr.models import Account
+from mymadr.revocation import revocation_list
 from mymadr.schemas import Message, Token, UserOnUpdate, UserPublic, UserSchema
 from mymadr.security import (
+    TokenPayload,
     create_access_token,
     get_current_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    key_set,
+    principal_cache,
+    verify_and_update_password_async,
 )
+from mymadr.throttling import check_login_rate
 
 router = APIRouter()
 
@@ -37,12 +44,19 @@ GetCurrentUser = Annotated[Account, Depends(get_current_user)]
     tags=["conta"],
 )
 async def create_user(user: UserSchema, session: GetSession):
-    hashed_password = get_password_hash(user.password.get_secret_value())
-    user_info = Account(
-        username=user.username, password=hashed_password, email=user.email
+    hashed_password = await get_password_hash_async(
+        user.password.get_secret_value()
     )
     try:
-        session.add(user_info)
+        user_db = await session.scalar(
+            insert(Account)
+            .values(
+                username=user.username,
+                password=hashed_password,
+                email=user.email,
+            )
+            .returning(Account)
+        )
         await session.commit()
     except IntegrityError as e:
         await session.rollback()
@@ -63,8 +77,7 @@ async def create_user(user: UserSchema, session: GetSession):
             # TODO: vale a pena trabalhar nessa mensagem???
             detail=f"Erro de integridade ao cadastrar usuário: ({er_msg})",
         )
-    await session.refresh(user_info)
-    return user_info
+    return user_db
 
 
 @router.put(
@@ -89,15 +102,19 @@ async def update_user(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail=ResponseMessage.AUTH_NOT_AUTHORIZED,
         )
+    subject_email = current_user.email
     try:
         user_info = user.model_dump(exclude_unset=True)
         for field, value in user_info.items():
             if field == "password":
-                hashed_password = get_password_hash(value.get_secret_value())
+                hashed_password = await get_password_hash_async(
+                    value.get_secret_value()
+                )
                 setattr(current_user, field, hashed_password)
                 continue
             setattr(current_user, field, value)
         await session.commit()
+        principal_cache.invalidate(subject_email)
         await session.refresh(current_user)
         return current_user
     except IntegrityError as e:
@@ -140,6 +157,7 @@ async def delete_user(
         )
     await session.delete(current_user)
     await session.commit()
+    principal_cache.invalidate(current_user.email)
     return {"message": "Conta deletada com sucesso"}
 
 
@@ -147,10 +165,16 @@ async def delete_user(
 @router.post(
     "/token",
     response_model=Token,
-    responses={HTTPStatus.BAD_REQUEST: {"model": Message}},
+    responses={
+        HTTPStatus.BAD_REQUEST: {"model": Message},
+        HTTPStatus.TOO_MANY_REQUESTS: {"model": Message},
+    },
     tags=["autenticacao"],
 )
-async def login_for_access_token(form_data: TokenForm, session: GetSession):
+async def login_for_access_token(
+    request: Request, form_data: TokenForm, session: GetSession
+):
+    check_login_rate(request, form_data.username)
     user = await session.scalar(
         select(Account).where(Account.email == form_data.username)
     )
@@ -159,11 +183,18 @@ async def login_for_access_token(form_data: TokenForm, session: GetSession):
             status_code=HTTPStatus.BAD_REQUEST,
             detail=ResponseMessage.AUTH_INVALID_CREDENTIALS,
         )
-    if not verify_password(form_data.password, user.password):
+    valid, updated_hash = await verify_and_update_password_async(
+        form_data.password, user.password
+    )
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail=ResponseMessage.AUTH_INVALID_CREDENTIALS,
         )
+    if updated_hash:  # parâmetros do argon2 mudaram, regrava o hash
+        user.password = updated_hash
+        await session.commit()
+        principal_cache.invalidate(user.email)
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -172,3 +203,26 @@ async def login_for_access_token(form_data: TokenForm, session: GetSession):
 def refresh_access_token(current_user: GetCurrentUser):
     new_access_token = create_access_token(data={"sub": current_user.email})
     return {"access_token": new_access_token, "token_type": "bearer"}
+
+
+@router.post(
+    "/logout",
+    response_model=Message,
+    responses={HTTPStatus.UNAUTHORIZED: {"model": Message}},
+    tags=["autenticacao"],
+)
+async def logout(
+    payload: TokenPayload,
+    session: GetSession,
+    current_user: GetCurrentUser,
+):
+    if payload.get("jti"):
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=ZoneInfo("UTC"))
+        await revocation_list.revoke(session, payload["jti"], expires_at)
+    return {"message": ResponseMessage.AUTH_LOGOUT_SUCCESS}
+
+
+@router.get("/.well-known/jwks.json", tags=["autenticacao"])
+def get_jwks(response: Response):
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_set.jwks()
@@ -0,0 +1,39 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.autocomplete import (
+    prefix_params,
+    suggestion_index,
+    suggestions_query,
+)
+from mymadr.database import get_read_session
+from mymadr.schemas import SuggestionList, SuggestionQuery
+from mymadr.settings import settings
+
+router = APIRouter(prefix="/autocompletar", tags=["autocompletar"])
+
+GetReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+QuerySuggestion = Annotated[SuggestionQuery, Query()]
+
+
+# caminho vazio: `GET /autocompletar?prefixo=` sem o redirect da barra
+@router.get("", status_code=HTTPStatus.OK, response_model=SuggestionList)
+async def autocomplete(session: GetReadSession, query: QuerySuggestion):
+    if settings.AUTOCOMPLETE_MEMORY_INDEX:
+        rows = await suggestion_index.search(
+            session, query.prefix, query.limit
+        )
+    else:
+        rows = await session.execute(
+            suggestions_query(session.bind.dialect.name),
+            prefix_params(query.prefix, query.limit),
+        )
+    return {
+        "sugestoes": [
+            {"texto": text, "tipo": kind, "id": suggestion_id}
+            for text, kind, suggestion_id in rows
+        ]
+    }
@@ -1,15 +1,53 @@
+from functools import lru_cache
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    bindparam,
+    delete,
+    desc,
+    func,
+    insert,
+    literal_column,
+    null,
+    select,
+    union_all,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 
-from mymadr.database import get_session
+from mymadr.autocomplete import suggestion_index
+from mymadr.batch import create_books
+from mymadr.cache import book_cache
+from mymadr.conditional import conditional, entity_entry, list_tag
+from mymadr.database import get_read_session, get_session, may_lag
+from mymadr.export import ExportFormat, export_response
 from mymadr.messages import ResponseMessage
 from mymadr.models import Account, Book, Novelist
+from mymadr.pagination import (
+    SortKey,
+    count_total,
+    page,
+    page_params,
+    paginate,
+    sort_keys,
+)
 from mymadr.schemas import (
+    BatchResult,
+    BookBatch,
+    BookExpand,
+    BookExpanded,
     BookFilter,
     BookList,
     BookOnUpdate,
@@ -17,13 +55,135 @@ from mymadr.schemas import (
     BookSchema,
     Message,
 )
+from mymadr.search import (
+    books_fts,
+    search_mode,
+    substring_condition,
+    substring_pattern,
+)
 from mymadr.security import get_current_user
+from mymadr.settings import settings
 
 router = APIRouter(prefix="/livro", tags=["livro"])
 
 GetSession = Annotated[AsyncSession, Depends(get_session)]
+GetReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 GetCurrentUser = Annotated[Account, Depends(get_current_user)]
 QueryFilter = Annotated[BookFilter, Query()]
+QueryExpand = Annotated[Optional[BookExpand], Query()]
+
+BOOK_ORDER = (SortKey(Book.id),)
+# `ordenar`: só colunas com índice que termina em `id` (desempate)
+BOOK_SORT_COLUMNS = {"id": Book.id, "ano": Book.year, "titulo": Book.title}
+# filtros por valor de `query_books`, na ordem em que entram no WHERE
+BOOK_FILTERS = ("year", "year_min", "year_max", "novelist_id")
+
+
+def book_items(books: list[Book], expand: bool) -> list:
+    """Itens de `BookList`. Sem `expandir` o romancista não foi carregado:
+    os livros viram `BookPublic` antes da resposta, para que a validação de
+    `BookExpanded` não toque no relacionamento (IO implícito)."""
+    if expand:
+        return books
+    return [BookPublic.model_validate(b, from_attributes=True) for b in books]
+
+
+@lru_cache(maxsize=64)
+def books_query(
+    title_mode: Optional[str], filters: frozenset[str] = frozenset()
+):
+    """Consulta de `query_books` para uma combinação de filtros
+    (`filters`, nomes de `BOOK_FILTERS`).
+
+    Os valores entram como `bindparam`: cada combinação é montada uma vez
+    e gera sempre o mesmo SQL, aproveitado pelo cache de compilação do
+    SQLAlchemy e pelos prepared statements do psycopg. O intervalo de anos
+    vira `year >= :year_min AND year <= :year_max`, uma faixa contínua de
+    `ix_books_year_id` (ou de `ix_books_novelist_id_year`).
+    """
+    query = select(Book)
+    if title_mode:
+        query = query.where(
+            substring_condition(
+                title_mode,
+                Book.title,
+                books_fts.c.title,
+                Book.id,
+                bindparam("title"),
+            )
+        )
+    if "year" in filters:
+        query = query.where(Book.year == bindparam("year"))
+    if "year_min" in filters:
+        query = query.where(Book.year >= bindparam("year_min"))
+    if "year_max" in filters:
+        query = query.where(Book.year <= bindparam("year_max"))
+    if "novelist_id" in filters:
+        query = query.where(Book.novelist_id == bindparam("novelist_id"))
+    return query
+
+
+@lru_cache(maxsize=64)
+def facets_query(
+    title_mode: Optional[str],
+    filters: frozenset[str],
+    facets: tuple[str, ...],
+):
+    """Maiores grupos de cada faceta para os filtros de `books_query`.
+
+    Um `GROUP BY` por faceta, com os mesmos predicados (e `bindparam`) da
+    página, unidos por `UNION ALL`: uma única consulta ao banco.
+    """
+    base = books_query(title_mode, filters)
+    branches = []
+    if "ano" in facets:
+        branches.append(
+            base.with_only_columns(
+                literal_column("'ano'").label("faceta"),
+                Book.year.label("valor"),
+                null().label("nome"),
+                func.count().label("total"),
+            ).group_by(Book.year)
+        )
+    if "romancista" in facets:
+        branches.append(
+            base
+            .with_only_columns(
+                literal_column("'romancista'").label("faceta"),
+                Novelist.id.label("valor"),
+                Novelist.name.label("nome"),
+                func.count().label("total"),
+            )
+            .select_from(Book)
+            .join(Novelist, Novelist.id == Book.novelist_id)
+            .group_by(Novelist.id, Novelist.name)
+        )
+    # o sqlite não aceita ORDER BY/LIMIT direto em cada ramo do UNION
+    top = [
+        select(
+            branch
+            .order_by(desc("total"), "valor")
+            .limit(settings.FACET_TOP_N)
+            .subquery()
+        )
+        for branch in branches
+    ]
+    return union_all(*top).order_by("faceta", desc("total"), "valor")
+
+
+def facet_buckets(rows) -> dict:
+    buckets = {}
+    for row in rows:
+        if row.faceta == "ano":
+            bucket = {"ano": row.valor, "total": row.total}
+        else:
+            bucket = {
+                "romancista_id": row.valor,
+                "nome": row.nome,
+                "total": row.total,
+            }
+        buckets.setdefault(row.faceta, []).append(bucket)
+    return buckets
 
 
 @router.post(
@@ -40,18 +200,17 @@ async def register_book(
     session: GetSession,
     current_user: GetCurrentUser,
 ):
-    book_info = Book(
-        title=book.title, year=book.year, novelist_id=book.novelist_id
-    )
     try:
-        session.add(book_info)
+        book_db = await session.scalar(
+            insert(Book).values(**book.model_dump()).returning(Book)
+        )
         await session.commit()
-        await session.refresh(book_info)
-        return book_info
+        suggestion_index.invalidate()
+        return book_db
     except IntegrityError as er:
         await session.rollback()
         er_msg = str(er.orig).lower()
-        if "novelist_id" in er_msg:
+        if "novelist_id" in er_msg or "foreign key" in er_msg:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
                 detail=ResponseMessage.NOVELIST_NOT_FOUND,
@@ -64,20 +223,78 @@ async def register_book(
         )
 
 
+@router.post(
+    "/lote",
+    status_code=HTTPStatus.OK,
+    response_model=BatchResult,
+)
+async def register_books_batch(
+    batch: BookBatch,
+    session: GetSession,
+    current_user: GetCurrentUser,
+):
+    results = await create_books(session, batch.books)
+    suggestion_index.invalidate()
+    return {"resultados": results}
+
+
+@router.get(
+    "/export",
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+)
+async def export_books(
+    session: GetReadSession, formato: ExportFormat = "ndjson"
+):
+    query = select(
+        Book.id.label("id"),
+        Book.title.label("titulo"),
+        Book.year.label("ano"),
+        Book.novelist_id.label("romancista_id"),
+    ).order_by(Book.id)
+    return export_response(session, query, formato, "livros")
+
+
 @router.get(
     "/{book_id}",
     status_code=HTTPStatus.OK,
-    response_model=BookPublic,
+    response_model=BookExpanded | BookPublic,
     responses={HTTPStatus.NOT_FOUND: {"model": Message}},
 )
-async def get_book(book_id: int, session: GetSession):
-    book_db = await session.scalar(select(Book).where(Book.id == book_id))
-    if not book_db:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail=ResponseMessage.BOOK_NOT_FOUND,
-        )
-    return book_db
+async def get_book(
+    book_id: int,
+    request: Request,
+    response: Response,
+    session: GetReadSession,
+    expandir: QueryExpand = None,
+):
+    # o 304 sai do cache (ou de uma linha) sem serializar o livro; o livro
+    # expandido depende também da versão do romancista e fica fora do cache
+    entry = None if expandir else await book_cache.get(book_id)
+    if entry is None:
+        query = select(Book).where(Book.id == book_id)
+        if expandir:
+            query = query.options(joinedload(Book.novelist))
+        book_db = await session.scalar(query)
+        if not book_db:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=ResponseMessage.BOOK_NOT_FOUND,
+            )
+        if expandir:
+            entry = entity_entry(BookExpanded, book_db, book_db.novelist)
+        else:
+            entry = entity_entry(BookPublic, book_db)
+            # uma réplica atrasada traria de volta o livro de antes da
+            # escrita que acabou de invalidar o cache
+            if not may_lag(session):
+                await book_cache.set(book_id, entry)
+    not_modified = conditional(
+        request, response, entry["etag"], entry["last_modified"]
+    )
+    if not_modified:
+        return not_modified
+    return entry["body"]
 
 
 @router.get(
@@ -85,18 +302,61 @@ async def get_book(book_id: int, session: GetSession):
     status_code=HTTPStatus.OK,
     response_model=BookList,
 )
-async def query_books(session: GetSession, book_filter: QueryFilter):
-    query = select(Book)
+async def query_books(
+    request: Request,
+    response: Response,
+    session: GetReadSession,
+    book_filter: QueryFilter,
+):
+    keys = sort_keys(book_filter.order, BOOK_SORT_COLUMNS, Book.id)
+    params = page_params(keys, book_filter.cursor, book_filter.page_size)
+    mode = None
     if book_filter.title:
-        query = query.filter(Book.title.contains(book_filter.title))
-    if book_filter.year:
-        query = query.filter(Book.year == book_filter.year)
-    if book_filter.novelist_id:
-        query = query.filter(Book.novelist_id == book_filter.novelist_id)
-    books_list = await session.scalars(
-        query.offset(book_filter.offset).limit(book_filter.limit)
+        mode = search_mode(session.bind.dialect.name, book_filter.title)
+        params["title"] = substring_pattern(mode, book_filter.title)
+    filters = {
+        name: value
+        for name in BOOK_FILTERS
+        if (value := getattr(book_filter, name)) is not None
+    }
+    params.update(filters)
+    query = books_query(mode, frozenset(filters))
+    page_query = paginate(query, keys, book_filter.cursor is not None)
+    if book_filter.expand:
+        # uma consulta a mais por página, não uma por livro
+        page_query = page_query.options(selectinload(Book.novelist))
+    books_list = await session.scalars(page_query, params)
+    books_page = page("livros", books_list.all(), keys, book_filter.page_size)
+    if book_filter.count:
+        books_page |= await count_total(
+            session, query, settings.COUNT_EXACT_THRESHOLD, params
+        )
+    if book_filter.facets:
+        facets = await session.execute(
+            facets_query(
+                mode,
+                frozenset(filters),
+                tuple(sorted(set(book_filter.facets))),
+            ),
+            params,
+        )
+        books_page["facetas"] = facet_buckets(facets)
+    books = books_page["livros"]
+    etag = list_tag(
+        books,
+        books_page["proximo"],
+        books_page.get("total"),
+        books_page.get("total_estimado"),
+        books_page.get("facetas"),
+        [(b.novelist.id, b.novelist.version) for b in books]
+        if book_filter.expand
+        else None,
     )
-    return {"livros": books_list.all()}
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    books_page["livros"] = book_items(books, bool(book_filter.expand))
+    return books_page
 
 
 @router.patch(
@@ -114,44 +374,46 @@ async def update_book(
     session: GetSession,
     current_user: GetCurrentUser,
 ):
-    book_db = await session.scalar(select(Book).where(Book.id == book_id))
-    if not book_db:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail="Livro não consta no MADR",
-        )
-    if book.novelist_id is not None:
-        romancista_db = await session.scalar(
-            select(Novelist).where(Novelist.id == book.novelist_id)
+    try:
+        book_db = await session.scalar(
+            update(Book)
+            .where(Book.id == book_id)
+            .values(**book.model_dump(exclude_unset=True))
+            .returning(Book)
         )
-        if not romancista_db:
+        await session.commit()
+        await book_cache.invalidate(book_id)
+        suggestion_index.invalidate()
+    except IntegrityError as e:
+        await session.rollback()
+        er_msg = str(e.orig).lower()
+        if "novelist_id" in er_msg or "foreign key" in er_msg:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
                 detail=ResponseMessage.NOVELIST_NOT_FOUND,
             )
-    try:
-        book_info = book.model_dump(exclude_unset=True)
-        for field, value in book_info.items():
-            setattr(book_db, field, value)
-        await session.commit()
-        await session.refresh(book_db)
-        return book_db
-    # trata qualquer IntegrityError inesperado
-    except IntegrityError as e:  # pragma: no cover
-        await session.rollback()
-        er_msg = str(e.orig).lower()
-        raise HTTPException(
+        # trata qualquer IntegrityError inesperado
+        raise HTTPException(  # pragma: no cover
             status_code=HTTPStatus.CONFLICT,
             # TODO: vale a pena trabalhar nessa mensagem???
             detail=f"Erro de integridade ao atualizar livro: ({er_msg})",
         )
+    if not book_db:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ResponseMessage.BOOK_NOT_FOUND,
+        )
+    return book_db
 
 
 @router.delete(
     "/{book_id}",
     status_code=HTTPStatus.OK,
     response_model=Message,
-    responses={HTTPStatus.BAD_REQUEST: {"model": Message}},
+    responses={
+        HTTPStatus.NOT_FOUND: {"model": Message},
+        HTTPStatus.BAD_REQUEST: {"model": Message},
+    },
 )
 async def delete_book(
     book_id: int,
@@ -159,10 +421,12 @@ async def delete_book(
     current_user: GetCurrentUser,
 ):
     try:
-        book_db = await session.scalar(select(Book).where(Book.id == book_id))
-        await session.delete(book_db)
+        deleted_id = await session.scalar(
+            delete(Book).where(Book.id == book_id).returning(Book.id)
+        )
         await session.commit()
-        return {"message": ResponseMessage.BOOK_DELETED_SUCCESS}
+        await book_cache.invalidate(book_id)
+        suggestion_index.invalidate()
     # trata qualquer IntegrityError inesperado
     except IntegrityError:  # pragma: no cover
         await session.rollback()
@@ -171,3 +435,9 @@ async def delete_book(
             # TODO: vale a pena trabalhar nessa mensagem???
             detail="Erro ao deletar livro no MADR",
         )
+    if deleted_id is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ResponseMessage.BOOK_NOT_FOUND,
+        )
+    return {"message": ResponseMessage.BOOK_DELETED_SUCCESS}
@@ -0,0 +1,27 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+
+from mymadr.autocomplete import suggestion_index
+from mymadr.cache import book_cache, novelist_cache
+from mymadr.database import engine, pool_stats
+from mymadr.revocation import revocation_list
+from mymadr.security import password_pool, principal_cache
+from mymadr.throttling import login_email_limiter, login_ip_limiter
+
+router = APIRouter(prefix="/metricas", tags=["metricas"])
+
+
+@router.get("/", status_code=HTTPStatus.OK)
+def get_metrics():
+    return {
+        "banco": pool_stats(engine),
+        "senhas": password_pool.stats(),
+        "cache_usuarios": principal_cache.stats(),
+        "cache_livros": book_cache.stats(),
+        "cache_romancistas": novelist_cache.stats(),
+        "autocompletar": suggestion_index.stats(),
+        "login_por_email": login_email_limiter.stats(),
+        "login_por_ip": login_ip_limiter.stats(),
+        "revogacao": revocation_list.stats(),
+    }
@@ -1,28 +1,90 @@
+from functools import lru_cache
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from mymadr.database import get_session
+from mymadr.autocomplete import suggestion_index
+from mymadr.batch import create_novelists
+from mymadr.cache import book_cache, novelist_cache
+from mymadr.conditional import (
+    conditional,
+    entity_entry,
+    entity_tag,
+    list_tag,
+)
+from mymadr.database import get_read_session, get_session, may_lag
+from mymadr.export import ExportFormat, export_response
 from mymadr.messages import ResponseMessage
 from mymadr.models import Account, Novelist
+from mymadr.pagination import (
+    count_total,
+    page,
+    page_params,
+    paginate,
+    sort_keys,
+)
+from mymadr.routers.books import BOOK_ORDER, book_items, books_query
 from mymadr.schemas import (
+    BatchResult,
+    BookList,
+    FilterPagination,
     Message,
+    NovelistBatch,
     NovelistFilter,
     NovelistList,
     NovelistPublic,
     NovelistSchema,
+    NovelistStats,
+)
+from mymadr.search import (
+    novelists_fts,
+    search_mode,
+    substring_condition,
+    substring_pattern,
 )
 from mymadr.security import get_current_user
+from mymadr.settings import settings
 
 router = APIRouter(prefix="/romancista", tags=["romancista"])
 
 GetSession = Annotated[AsyncSession, Depends(get_session)]
+GetReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 GetCurrentUser = Annotated[Account, Depends(get_current_user)]
 QueryFilter = Annotated[NovelistFilter, Query()]
+QueryPagination = Annotated[FilterPagination, Query()]
+
+# `ordenar`: `nome` é único: não precisa de desempate
+NOVELIST_SORT_COLUMNS = {"id": Novelist.id, "nome": Novelist.name}
+
+
+@lru_cache(maxsize=8)
+def novelists_query(name_mode: Optional[str]):
+    """Consulta de `query_novelists`; o nome buscado entra como
+    `bindparam`, como em `books_query`."""
+    query = select(Novelist)
+    if name_mode:
+        query = query.where(
+            substring_condition(
+                name_mode,
+                Novelist.name,
+                novelists_fts.c.name,
+                Novelist.id,
+                bindparam("name"),
+            )
+        )
+    return query
 
 
 @router.post(
@@ -36,12 +98,13 @@ async def register_novelist(
     session: GetSession,
     current_user: GetCurrentUser,
 ):
-    novelist_info = Novelist(novelist.name)
     try:
-        session.add(novelist_info)
+        novelist_db = await session.scalar(
+            insert(Novelist).values(name=novelist.name).returning(Novelist)
+        )
         await session.commit()
-        await session.refresh(novelist_info)
-        return novelist_info
+        suggestion_index.invalidate()
+        return novelist_db
     except IntegrityError as e:
         await session.rollback()
         er_msg = str(e.orig).lower()
@@ -58,22 +121,141 @@ async def register_novelist(
         )
 
 
+@router.post(
+    "/lote",
+    status_code=HTTPStatus.OK,
+    response_model=BatchResult,
+)
+async def register_novelists_batch(
+    batch: NovelistBatch,
+    session: GetSession,
+    current_user: GetCurrentUser,
+):
+    results = await create_novelists(
+        session, [novelist.name for novelist in batch.novelists]
+    )
+    suggestion_index.invalidate()
+    return {"resultados": results}
+
+
+@router.get(
+    "/export",
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+)
+async def export_novelists(
+    session: GetReadSession, formato: ExportFormat = "ndjson"
+):
+    query = select(Novelist.id.label("id"), Novelist.name.label("nome"))
+    return export_response(
+        session, query.order_by(Novelist.id), formato, "romancistas"
+    )
+
+
+def _stats_entry(novelist: Novelist) -> dict:
+    # as estatísticas mudam com os livros sem mudar a versão do romancista:
+    # o ETag leva os próprios valores e não há `Last-Modified`
+    body = NovelistStats.model_validate(novelist, from_attributes=True)
+    return {
+        "body": body.model_dump(by_alias=True),
+        "etag": entity_tag(
+            novelist.id,
+            novelist.version,
+            novelist.book_count,
+            novelist.first_year,
+            novelist.last_year,
+        ),
+        "last_modified": None,
+    }
+
+
 @router.get(
     "/{novelist_id}",
     status_code=HTTPStatus.OK,
-    response_model=NovelistPublic,
+    response_model=NovelistStats | NovelistPublic,
+    responses={HTTPStatus.NOT_FOUND: {"model": Message}},
+)
+async def get_novelist(
+    novelist_id: int,
+    request: Request,
+    response: Response,
+    session: GetReadSession,
+    estatisticas: bool = False,
+):
+    entry = None if estatisticas else await novelist_cache.get(novelist_id)
+    if entry is None:
+        romancista_db = await session.scalar(
+            select(Novelist)
+            .where(Novelist.id == novelist_id)
+            # os triggers atualizam as estatísticas por fora do ORM
+            .execution_options(populate_existing=True)
+        )
+        if not romancista_db:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=ResponseMessage.NOVELIST_NOT_FOUND,
+            )
+        if estatisticas:
+            entry = _stats_entry(romancista_db)
+        else:
+            entry = entity_entry(NovelistPublic, romancista_db)
+            if not may_lag(session):  # como em `get_book`
+                await novelist_cache.set(novelist_id, entry)
+    not_modified = conditional(
+        request, response, entry["etag"], entry["last_modified"]
+    )
+    if not_modified:
+        return not_modified
+    return entry["body"]
+
+
+@router.get(
+    "/{novelist_id}/livros",
+    status_code=HTTPStatus.OK,
+    response_model=BookList,
     responses={HTTPStatus.NOT_FOUND: {"model": Message}},
 )
-async def get_novelist(novelist_id: int, session: GetSession):
-    romancista_db = await session.scalar(
-        select(Novelist).where(Novelist.id == novelist_id)
+async def query_novelist_books(
+    novelist_id: int,
+    request: Request,
+    response: Response,
+    session: GetReadSession,
+    pagination: QueryPagination,
+):
+    params = page_params(BOOK_ORDER, pagination.cursor, pagination.page_size)
+    params["novelist_id"] = novelist_id
+    query = books_query(None, frozenset({"novelist_id"}))
+    books_list = await session.scalars(
+        paginate(query, BOOK_ORDER, pagination.cursor is not None), params
     )
-    if romancista_db:
-        return romancista_db
-    raise HTTPException(
-        status_code=HTTPStatus.NOT_FOUND,
-        detail=ResponseMessage.NOVELIST_NOT_FOUND,
+    books_page = page(
+        "livros", books_list.all(), BOOK_ORDER, pagination.page_size
     )
+    if not books_page["livros"] and pagination.cursor is None:
+        # só uma primeira página vazia precisa saber se o romancista existe
+        novelist_db = await session.scalar(
+            select(Novelist.id).where(Novelist.id == novelist_id)
+        )
+        if novelist_db is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=ResponseMessage.NOVELIST_NOT_FOUND,
+            )
+    if pagination.count:
+        books_page |= await count_total(
+            session, query, settings.COUNT_EXACT_THRESHOLD, params
+        )
+    etag = list_tag(
+        books_page["livros"],
+        books_page["proximo"],
+        books_page.get("total"),
+        books_page.get("total_estimado"),
+    )
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    books_page["livros"] = book_items(books_page["livros"], expand=False)
+    return books_page
 
 
 @router.get(
@@ -82,16 +264,44 @@ async def get_novelist(novelist_id: int, session: GetSession):
     response_model=NovelistList,
 )
 async def query_novelists(
-    session: GetSession,
+    request: Request,
+    response: Response,
+    session: GetReadSession,
     novelist_filter: QueryFilter,
 ):
-    query = select(Novelist)
+    keys = sort_keys(novelist_filter.order, NOVELIST_SORT_COLUMNS, Novelist.id)
+    params = page_params(
+        keys, novelist_filter.cursor, novelist_filter.page_size
+    )
+    mode = None
     if novelist_filter.name:
-        query = query.filter(Novelist.name.contains(novelist_filter.name))
+        mode = search_mode(session.bind.dialect.name, novelist_filter.name)
+        params["name"] = substring_pattern(mode, novelist_filter.name)
+    query = novelists_query(mode)
     novelists_list = await session.scalars(
-        query.offset(novelist_filter.offset).limit(novelist_filter.limit)
+        paginate(query, keys, novelist_filter.cursor is not None),
+        params,
+    )
+    novelists_page = page(
+        "romancistas",
+        novelists_list.all(),
+        keys,
+        novelist_filter.page_size,
+    )
+    if novelist_filter.count:
+        novelists_page |= await count_total(
+            session, query, settings.COUNT_EXACT_THRESHOLD, params
+        )
+    etag = list_tag(
+        novelists_page["romancistas"],
+        novelists_page["proximo"],
+        novelists_page.get("total"),
+        novelists_page.get("total_estimado"),
     )
-    return {"romancistas": novelists_list.all()}
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    return novelists_page
 
 
 @router.patch(
@@ -112,17 +322,14 @@ async def update_novelist(
 ):
     try:
         novelist_db = await session.scalar(
-            select(Novelist).where(Novelist.id == novelist_id)
+            update(Novelist)
+            .where(Novelist.id == novelist_id)
+            .values(name=novelist.name)
+            .returning(Novelist)
         )
-        if not novelist_db:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail=ResponseMessage.NOVELIST_NOT_FOUND,
-            )
-        novelist_db.name = novelist.name
         await session.commit()
-        await session.refresh(novelist_db)
-        return novelist_db
+        await novelist_cache.invalidate(novelist_id)
+        suggestion_index.invalidate()
     except IntegrityError as e:
         await session.rollback()
         er_msg = str(e.orig).lower()
@@ -137,13 +344,22 @@ async def update_novelist(
             status_code=HTTPStatus.BAD_REQUEST,
             detail=f"Erro de integridade ao atualizar romancista: ({er_msg})",
         )
+    if not novelist_db:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ResponseMessage.NOVELIST_NOT_FOUND,
+        )
+    return novelist_db
 
 
 @router.delete(
     "/{novelist_id}",
     status_code=HTTPStatus.OK,
     response_model=Message,
-    responses={HTTPStatus.BAD_REQUEST: {"model": Message}},
+    responses={
+        HTTPStatus.NOT_FOUND: {"model": Message},
+        HTTPStatus.BAD_REQUEST: {"model": Message},
+    },
 )
 async def delete_novelist(
     novelist_id: int,
@@ -151,12 +367,13 @@ async def delete_novelist(
     current_user: GetCurrentUser,
 ):
     try:
-        novelist_db = await session.scalar(
-            select(Novelist).where(Novelist.id == novelist_id)
+        # os livros saem junto pelo `ON DELETE CASCADE` de `books`
+        deleted_id = await session.scalar(
+            delete(Novelist)
+            .where(Novelist.id == novelist_id)
+            .returning(Novelist.id)
         )
-        await session.delete(novelist_db)
         await session.commit()
-        return {"message": ResponseMessage.NOVELIST_DELETED_SUCCESS}
     # trata qualquer IntegrityError inesperado
     except IntegrityError:  # pragma: no cover
         await session.rollback()
@@ -165,3 +382,14 @@ async def delete_novelist(
             # TODO: vale a pena trabalhar nessa mensagem???
             detail="Erro ao deletar romancista no MADR",
         )
+    if deleted_id is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=ResponseMessage.NOVELIST_NOT_FOUND,
+        )
+    await novelist_cache.invalidate(novelist_id)
+    # o cache de livros é por id do livro: sem saber quais saíram no
+    # cascade, descarta todos (remover romancista é raro)
+    await book_cache.invalidate_all()
+    suggestion_index.invalidate()
+    return {"message": ResponseMessage.NOVELIST_DELETED_SUCCESS}
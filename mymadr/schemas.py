@@ -1,7 +1,7 @@
 import re
 from datetime import date
 from http import HTTPStatus
-from typing import Annotated, Optional, Self
+from typing import Annotated, Literal, Optional, Self
 
 from fastapi import HTTPException
 from pydantic import (
@@ -11,10 +11,12 @@ from pydantic import (
     EmailStr,
     Field,
     SecretStr,
+    field_validator,
     model_validator,
 )
 
 from mymadr.messages import ResponseMessage
+from mymadr.settings import settings
 
 
 # --- funções de sanitização ---
@@ -79,6 +81,26 @@ class UserOnUpdate(BaseModel):
         return self
 
 
+# --- pages ---
+class Page(BaseModel):
+    next_cursor: Optional[str] = Field(None, alias="proximo")
+    has_more: bool = False
+    total: Optional[int] = None
+    total_estimated: Optional[bool] = Field(None, alias="total_estimado")
+
+
+# --- batches ---
+class BatchItemResult(BaseModel):
+    index: int = Field(alias="indice")
+    id: Optional[int] = None
+    status: Literal["criado", "existente", "erro"]
+    message: Optional[str] = Field(None, alias="mensagem")
+
+
+class BatchResult(BaseModel):
+    results: list[BatchItemResult] = Field(alias="resultados")
+
+
 # --- novelists ---
 class NovelistSchema(BaseModel):
     name: SanitizedString = Field(alias="nome")
@@ -90,10 +112,22 @@ class NovelistPublic(NovelistSchema):
     id: int
 
 
-class NovelistList(BaseModel):
+class NovelistStats(NovelistPublic):
+    book_count: int = Field(alias="total_livros")
+    first_year: Optional[int] = Field(alias="primeiro_ano")
+    last_year: Optional[int] = Field(alias="ultimo_ano")
+
+
+class NovelistList(Page):
     novelists: list[NovelistPublic] = Field(alias="romancistas")
 
 
+class NovelistBatch(BaseModel):
+    novelists: list[NovelistSchema] = Field(
+        alias="romancistas", min_length=1, max_length=settings.BATCH_MAX_SIZE
+    )
+
+
 # --- books ---
 class BookSchema(BaseModel):
     title: SanitizedString = Field(alias="titulo")
@@ -124,8 +158,61 @@ class BookPublic(BookSchema):
     id: int
 
 
-class BookList(BaseModel):
-    books: list[BookPublic] = Field(alias="livros")
+# relacionamentos que as leituras de livros podem trazer junto (`expandir`)
+BookExpand = Literal["romancista"]
+
+
+class BookExpanded(BookPublic):
+    novelist: NovelistPublic = Field(alias="romancista")
+
+
+class BookBatchItem(BaseModel):
+    title: SanitizedString = Field(alias="titulo")
+    year: int = Field(alias="ano")
+    # referência ao romancista pelo id ou pelo nome (criado se não existir)
+    novelist_id: Optional[int] = Field(None, alias="romancista_id")
+    novelist_name: Optional[SanitizedString] = Field(
+        None, min_length=1, alias="romancista"
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def check_novelist_reference(self) -> Self:
+        if (self.novelist_id is None) == (self.novelist_name is None):
+            raise ValueError("Informe `romancista_id` ou `romancista`")
+        return self
+
+
+class BookBatch(BaseModel):
+    books: list[BookBatchItem] = Field(
+        alias="livros", min_length=1, max_length=settings.BATCH_MAX_SIZE
+    )
+
+
+# contagens por grupo do filtro atual (`facetas`)
+BookFacet = Literal["ano", "romancista"]
+
+
+class YearFacet(BaseModel):
+    year: int = Field(alias="ano")
+    total: int
+
+
+class NovelistFacet(BaseModel):
+    novelist_id: int = Field(alias="romancista_id")
+    name: str = Field(alias="nome")
+    total: int
+
+
+class BookFacets(BaseModel):
+    years: Optional[list[YearFacet]] = Field(None, alias="ano")
+    novelists: Optional[list[NovelistFacet]] = Field(None, alias="romancista")
+
+
+class BookList(Page):
+    books: list[BookExpanded | BookPublic] = Field(alias="livros")
+    facets: Optional[BookFacets] = Field(None, alias="facetas")
 
 
 # --- auth ---
@@ -134,27 +221,80 @@ class Token(BaseModel):
     token_type: str
 
 
+# --- autocompletar ---
+class SuggestionQuery(BaseModel):
+    # `pattern`: só espaços viraria um prefixo vazio depois da sanitização
+    prefix: SanitizedString = Field(
+        min_length=1, max_length=50, pattern=r"\S", alias="prefixo"
+    )
+    limit: int = Field(
+        settings.AUTOCOMPLETE_LIMIT_DEFAULT,
+        ge=1,
+        le=settings.AUTOCOMPLETE_LIMIT_MAX,
+        alias="limite",
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class Suggestion(BaseModel):
+    kind: Literal["livro", "romancista"] = Field(alias="tipo")
+    id: int
+    text: str = Field(alias="texto")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class SuggestionList(BaseModel):
+    suggestions: list[Suggestion] = Field(alias="sugestoes")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 # --- pages and filters ---
-class FilterPagination(BaseModel):
-    page: int = Field(1, ge=1, lt=50, alias="pagina")
-    page_size: int = Field(20, frozen=True)
+# campos aceitos em `ordenar` (só colunas com índice); `-` inverte a ordem
+BOOK_SORT_FIELDS = ("id", "ano", "titulo")
+NOVELIST_SORT_FIELDS = ("id", "nome")
+
+
+def check_order(order: Optional[str], allowed: tuple[str, ...]):
+    if order is None:
+        return None
+    fields = [field.strip() for field in order.split(",")]
+    names = [field.removeprefix("-") for field in fields]
+    if len(set(names)) != len(names) or not set(names) <= set(allowed):
+        raise ValueError(
+            f"`ordenar` aceita {', '.join(allowed)} (com `-` para inverter)"
+        )
+    return ",".join(fields)
 
-    @property
-    def limit(self) -> int:
-        return self.page_size
 
-    @property
-    def offset(self) -> int:
-        return (self.page - 1) * self.page_size
+class FilterPagination(BaseModel):
+    cursor: Optional[str] = Field(None, max_length=512)
+    page_size: int = Field(
+        settings.PAGE_SIZE_DEFAULT,
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        alias="tamanho",
+    )
+    count: bool = Field(False, alias="contar")
+
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class NovelistFilter(FilterPagination):
     name: Optional[SanitizedString] = Field(
         None, min_length=1, max_length=50, alias="nome"
     )
+    order: Optional[str] = Field(None, max_length=50, alias="ordenar")
 
     model_config = ConfigDict(populate_by_name=True)
 
+    @field_validator("order")
+    @classmethod
+    def check_sort_fields(cls, value):
+        return check_order(value, NOVELIST_SORT_FIELDS)
+
 
 class BookFilter(FilterPagination):
     year: int | None = Field(None, le=date.today().year + 20, alias="ano")
@@ -162,9 +302,36 @@ class BookFilter(FilterPagination):
         None, min_length=1, max_length=20, alias="titulo"
     )
     novelist_id: int | None = Field(None, gt=0, alias="romancista_id")
+    year_min: int | None = Field(
+        None, le=date.today().year + 20, alias="ano_min"
+    )
+    year_max: int | None = Field(
+        None, le=date.today().year + 20, alias="ano_max"
+    )
+    order: str | None = Field(None, max_length=50, alias="ordenar")
+    expand: BookExpand | None = Field(None, alias="expandir")
+    facets: list[BookFacet] = Field([], alias="facetas")
 
     model_config = ConfigDict(populate_by_name=True)
 
+    @field_validator("order")
+    @classmethod
+    def check_sort_fields(cls, value):
+        return check_order(value, BOOK_SORT_FIELDS)
+
+    @field_validator("facets", mode="before")
+    @classmethod
+    def split_facets(cls, value):
+        # aceita `facetas=ano,romancista` e `facetas=ano&facetas=romancista`
+        if isinstance(value, str):
+            value = [value]
+        return [
+            facet.strip()
+            for item in value
+            for facet in item.split(",")
+            if facet.strip()
+        ]
+
     # when True checks for at least one field was provided
     _valid_fields: bool = False
 
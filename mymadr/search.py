@@ -0,0 +1,99 @@
+from typing import Union
+
+from sqlalchemy import (
+    BindParameter,
+    ColumnClause,
+    ColumnElement,
+    column,
+    select,
+    table,
+)
+from sqlalchemy.orm import InstrumentedAttribute
+
+# tabelas FTS5 (tokenizer trigram) que espelham `books.title` e
+# `novelists.name` no sqlite; mantidas por triggers, fora do metadata
+books_fts = table("books_fts", column("rowid"), column("title"))
+novelists_fts = table("novelists_fts", column("rowid"), column("name"))
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_mode(dialect_name: str, value: str) -> str:
+    """Como buscar `value`: "like", "escaped" (`LIKE ... ESCAPE`) ou "fts".
+
+    No postgres o `LIKE '%x%'` é atendido pelo índice GIN `gin_trgm_ops`
+    (a barra invertida já é o escape padrão do `LIKE`). No sqlite a busca
+    vai para a tabela FTS5, que perde o índice com `ESCAPE`; termos com
+    `%` ou `_` caem no `LIKE` comum da tabela.
+    """
+    if dialect_name != "sqlite":
+        return "like"
+    if "%" in value or "_" in value:
+        return "escaped"
+    return "fts"
+
+
+def substring_pattern(mode: str, value: str) -> str:
+    if mode == "fts":
+        return f"%{value}%"
+    return f"%{escape_like(value)}%"
+
+
+def substring_condition(
+    mode: str,
+    text_column: InstrumentedAttribute,
+    fts_column: ColumnClause,
+    id_column: InstrumentedAttribute,
+    pattern: Union[str, BindParameter],
+) -> ColumnElement[bool]:
+    if mode == "like":
+        return text_column.like(pattern)
+    if mode == "escaped":
+        return text_column.like(pattern, escape="\\")
+    fts_ids = select(fts_column.table.c.rowid).where(fts_column.like(pattern))
+    return id_column.in_(fts_ids)
+
+
+def substring_filter(
+    dialect_name: str,
+    text_column: InstrumentedAttribute,
+    fts_column: ColumnClause,
+    id_column: InstrumentedAttribute,
+    value: str,
+) -> ColumnElement[bool]:
+    """Filtro "contém `value`" que usa o índice de trigramas do banco."""
+    mode = search_mode(dialect_name, value)
+    return substring_condition(
+        mode,
+        text_column,
+        fts_column,
+        id_column,
+        substring_pattern(mode, value),
+    )
+
+
+def sqlite_fts_ddl(table_name: str, column_name: str) -> list[str]:
+    """Tabela FTS5 de `table_name.column_name` e as triggers de sincronia."""
+    fts = f"{table_name}_fts"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_name}) "
+        f"VALUES ('delete', old.id, old.{column_name});"
+    )
+    insert_new = (
+        f"INSERT INTO {fts}(rowid, {column_name}) "
+        f"VALUES (new.id, new.{column_name});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_name}, content='{table_name}', content_rowid='id', "
+        "tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_name} "
+        f"ON {table_name} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
@@ -1,17 +1,31 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from time import perf_counter, time
 from typing import Annotated, Optional
+from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer, utils
-from jwt import DecodeError, decode, encode
+from jwt import DecodeError, decode, encode, get_unverified_header
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from mymadr.cache import TTLCache
 from mymadr.database import get_session
+from mymadr.keys import SigningKeySet
+from mymadr.messages import ResponseMessage
 from mymadr.models import Account
+from mymadr.revocation import revocation_list
 from mymadr.settings import Settings
 
 settings = Settings()  # type: ignore
@@ -37,7 +51,19 @@ class CustomOAuth2PasswordBearer(OAuth2PasswordBearer):
         return await super().__call__(request)
 
 
-pwd_context = PasswordHash.recommended()
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    ),
+))
+key_set = SigningKeySet(
+    algorithm=settings.ALGORITHM,
+    secret_key=settings.SECRET_KEY,
+    keys_dir=settings.JWT_KEYS_DIR,
+    active_kid=settings.JWT_ACTIVE_KID,
+)
 oauth2_scheme = CustomOAuth2PasswordBearer(
     tokenUrl="token",
     refreshUrl="token-refresh",
@@ -47,30 +73,85 @@ oauth2_scheme = CustomOAuth2PasswordBearer(
 TokenForm = Annotated[str, Depends(oauth2_scheme)]
 GetSession = Annotated[AsyncSession, Depends(get_session)]
 
+# payloads já verificados, indexados pelo próprio token
+payload_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
 
-async def get_current_user(
-    session: GetSession,
-    token: TokenForm,
-):
-    credential_exception = HTTPException(
+# principais já resolvidos, indexados pelo `sub` do token (email)
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+async def _cached_principal(session: AsyncSession, subject_email: str):
+    cached = principal_cache.get(subject_email)
+    if cached is None:
+        return None
+    user_id, username, email, password = cached
+    user = Account(username=username, password=password, email=email)
+    user.id = user_id
+    make_transient_to_detached(user)
+    # anexa à sessão sem ir ao banco (reaproveita a instância se já existir)
+    return await session.merge(user, load=False)
+
+
+def _credential_exception() -> HTTPException:
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail="Não autorizado",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_token(token: str) -> dict:
+    payload = payload_cache.get(token)
+    if payload is not None and payload.get("exp", 0) > time():
+        return payload
     try:
+        kid = get_unverified_header(token).get("kid")
         payload = decode(
-            jwt=token, key=settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            jwt=token,
+            key=key_set.verification_key(kid),
+            algorithms=[settings.ALGORITHM],
         )
-        subject_email = payload.get("sub")
-        if not subject_email:
-            raise credential_exception
-    except DecodeError:
-        raise credential_exception
+    except (DecodeError, KeyError):
+        raise _credential_exception()
+    if not payload.get("sub"):
+        raise _credential_exception()
+    payload_cache.set(token, payload)
+    return payload
+
+
+async def get_token_payload(token: TokenForm) -> dict:
+    return decode_token(token)
+
+
+TokenPayload = Annotated[dict, Depends(get_token_payload)]
+
+
+async def get_current_user(
+    session: GetSession,
+    token: TokenForm,
+):
+    payload = decode_token(token)
+    subject_email = payload["sub"]
+    jti = payload.get("jti")
+    if jti and await revocation_list.is_revoked(session, jti):
+        raise _credential_exception()
+    user = await _cached_principal(session, subject_email)
+    if user:
+        return user
     user = await session.scalar(
         select(Account).where(Account.email == subject_email)
     )
     if not user:
-        raise credential_exception
+        raise _credential_exception()
+    principal_cache.set(
+        subject_email, (user.id, user.username, user.email, user.password)
+    )
     return user
 
 
@@ -79,11 +160,13 @@ def create_access_token(data: dict):
     expire = datetime.now(tz=ZoneInfo("UTC")) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
+    kid, key = key_set.signing_key()
     encoded_jwt = encode(
         payload=to_encode,
-        key=settings.SECRET_KEY,
+        key=key,
         algorithm=settings.ALGORITHM,
+        headers={"kid": kid} if kid else None,
     )
     return encoded_jwt
 
@@ -96,4 +179,115 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    # retorna um novo hash quando os parâmetros do argon2 mudaram
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _timed_call(func, *args):
+    # roda dentro do worker, mede só o tempo gasto no argon2
+    started = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - started
+
+
+class PasswordHashPool:
+    """Pool limitado para rodar o Argon2 fora do event loop.
+
+    Cada chamada ocupa uma vaga (workers + fila); com todas as vagas
+    ocupadas a requisição é recusada com 503 em vez de esperar.
+    """
+
+    def __init__(self, kind: str, workers: int, queue_size: int):
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._hash_seconds = 0.0
+        self._max_hash_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="argon2"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail=ResponseMessage.AUTH_SERVICE_BUSY,
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        started = perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(
+                self.executor, _timed_call, func, *args
+            )
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self._hash_seconds += elapsed
+        self._max_hash_seconds = max(self._max_hash_seconds, elapsed)
+        self._wait_seconds += perf_counter() - started - elapsed
+        return result
+
+    def stats(self) -> dict:
+        done = self.completed or 1
+        return {
+            "workers": self.workers,
+            "capacidade": self.capacity,
+            "em_fila": self.pending,
+            "concluidas": self.completed,
+            "rejeitadas": self.rejected,
+            "latencia_media_ms": round(self._hash_seconds / done * 1000, 3),
+            "latencia_maxima_ms": round(self._max_hash_seconds * 1000, 3),
+            "espera_media_ms": round(self._wait_seconds / done * 1000, 3),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_POOL,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    return await password_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return await password_pool.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
 def token_expired(): ...  # TODO implement test
@@ -1,14 +1,93 @@
+from typing import Literal, Optional
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
-        env_file=".env", env_file_encoding="utf-8"
+        env_file=".env", env_file_encoding="utf-8", env_parse_none_str="None"
     )
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # psycopg: prepara no servidor a consulta executada N vezes na conexão
+    # (None desliga, necessário atrás de pgbouncer em modo transaction)
+    DB_PREPARE_THRESHOLD: Optional[int] = 5
+
+    # perfil sqlite (DATABASE_URL="sqlite+aiosqlite:///arquivo.db")
+    SQLITE_READ_POOL_SIZE: int = 4
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KIB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268_435_456
+    SQLITE_OPTIMIZE_INTERVAL_SECONDS: float = 3600
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # chaves assimétricas (ALGORITHM="EdDSA" ou "ES256")
+    JWT_KEYS_DIR: str = "keys"
+    JWT_ACTIVE_KID: Optional[str] = None
+    TOKEN_CACHE_TTL_SECONDS: float = 60
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+
+    # parâmetros do argon2 (calibrar com `python -m mymadr.cli`)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # pool de hashing de senhas (argon2)
+    PASSWORD_HASH_POOL: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # cache dos usuários autenticados (get_current_user)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # cache de livros e romancistas por id (GET /livro/{id} e
+    # GET /romancista/{id})
+    ENTITY_CACHE_TTL_SECONDS: float = 300
+    ENTITY_CACHE_MAX_SIZE: int = 10_000
+
+    # limite de tentativas de login (POST /token)
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = Field(10, gt=0)
+    LOGIN_RATE_LIMIT_PER_IP: int = Field(100, gt=0)
+    LOGIN_RATE_LIMIT_PERIOD_SECONDS: float = Field(60, gt=0)
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = Field(100_000, gt=0)
+
+    # revogação de tokens (jti)
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_REFRESH_SECONDS: float = 60
+
+    # paginação por cursor das listagens (`tamanho` da página)
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+    # `contar=true`: total exato até este limite, estimado acima
+    COUNT_EXACT_THRESHOLD: int = 10_000
+    # `facetas=ano,romancista`: quantos grupos (os maiores) por faceta
+    FACET_TOP_N: int = 10
+
+    # `/autocompletar`: sugestões por prefixo de nomes e títulos
+    AUTOCOMPLETE_LIMIT_DEFAULT: int = 10
+    AUTOCOMPLETE_LIMIT_MAX: int = 50
+    # responde de um índice em memória em vez do banco; recarregado na
+    # primeira consulta depois de uma escrita e a cada N segundos (o que
+    # propaga as escritas de outros processos)
+    AUTOCOMPLETE_MEMORY_INDEX: bool = False
+    AUTOCOMPLETE_REFRESH_SECONDS: float = 60
+
+    # cadastro em lote (/livro/lote e /romancista/lote)
+    BATCH_MAX_SIZE: int = 10_000
+
+    # exportação do catálogo (linhas buscadas por vez no cursor)
+    EXPORT_FETCH_SIZE: int = 1000
+
 
 settings: Settings = Settings()  # type: ignore
@@ -0,0 +1,106 @@
+# --- estatísticas dos romancistas (total de livros, primeiro/último ano) ---
+# mantidas por triggers em `books`: as escritas de livros são statements
+# Core (`insert`/`update`/`delete`, lotes), que os eventos do ORM não veem.
+# O total é incremental; os anos só são recalculados quando o livro que
+# sai era o mais antigo/recente, por `ix_books_novelist_id_year`.
+
+# no postgres os triggers são por statement, com tabelas de transição:
+# um lote de livros vira um UPDATE por romancista, não um por livro
+POSTGRES_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION novelist_stats() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- IFs aninhados: `old_books` não existe fora do UPDATE
+    IF TG_OP = 'UPDATE' THEN
+        IF NOT EXISTS (
+            SELECT 1 FROM old_books o JOIN new_books n USING (id)
+            WHERE o.year <> n.year OR o.novelist_id <> n.novelist_id
+        ) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE novelists n SET
+            book_count = n.book_count - o.total,
+            first_year = CASE WHEN o.first_year <= n.first_year THEN (
+                SELECT min(year) FROM books WHERE novelist_id = n.id
+            ) ELSE n.first_year END,
+            last_year = CASE WHEN o.last_year >= n.last_year THEN (
+                SELECT max(year) FROM books WHERE novelist_id = n.id
+            ) ELSE n.last_year END
+        FROM (
+            SELECT novelist_id, count(*) AS total,
+                min(year) AS first_year, max(year) AS last_year
+            FROM old_books GROUP BY novelist_id
+        ) o
+        WHERE n.id = o.novelist_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE novelists n SET
+            book_count = n.book_count + i.total,
+            first_year = LEAST(n.first_year, i.first_year),
+            last_year = GREATEST(n.last_year, i.last_year)
+        FROM (
+            SELECT novelist_id, count(*) AS total,
+                min(year) AS first_year, max(year) AS last_year
+            FROM new_books GROUP BY novelist_id
+        ) i
+        WHERE n.id = i.novelist_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+POSTGRES_STATS_DDL = [
+    POSTGRES_STATS_FUNCTION,
+    "CREATE TRIGGER books_stats_insert AFTER INSERT ON books "
+    "REFERENCING NEW TABLE AS new_books "
+    "FOR EACH STATEMENT EXECUTE FUNCTION novelist_stats()",
+    "CREATE TRIGGER books_stats_update AFTER UPDATE ON books "
+    "REFERENCING OLD TABLE AS old_books NEW TABLE AS new_books "
+    "FOR EACH STATEMENT EXECUTE FUNCTION novelist_stats()",
+    "CREATE TRIGGER books_stats_delete AFTER DELETE ON books "
+    "REFERENCING OLD TABLE AS old_books "
+    "FOR EACH STATEMENT EXECUTE FUNCTION novelist_stats()",
+]
+
+# o sqlite só tem triggers por linha; `min`/`max` com NULL devolvem NULL
+_SQLITE_REMOVE = (
+    "UPDATE novelists SET book_count = book_count - 1, "
+    "first_year = CASE WHEN old.year = first_year THEN "
+    "(SELECT min(year) FROM books WHERE novelist_id = old.novelist_id) "
+    "ELSE first_year END, "
+    "last_year = CASE WHEN old.year = last_year THEN "
+    "(SELECT max(year) FROM books WHERE novelist_id = old.novelist_id) "
+    "ELSE last_year END "
+    "WHERE id = old.novelist_id;"
+)
+_SQLITE_ADD = (
+    "UPDATE novelists SET book_count = book_count + 1, "
+    "first_year = min(coalesce(first_year, new.year), new.year), "
+    "last_year = max(coalesce(last_year, new.year), new.year) "
+    "WHERE id = new.novelist_id;"
+)
+SQLITE_STATS_DDL = [
+    f"CREATE TRIGGER books_stats_ai AFTER INSERT ON books "
+    f"BEGIN {_SQLITE_ADD} END",
+    f"CREATE TRIGGER books_stats_ad AFTER DELETE ON books "
+    f"BEGIN {_SQLITE_REMOVE} END",
+    f"CREATE TRIGGER books_stats_au AFTER UPDATE OF year, novelist_id "
+    f"ON books BEGIN {_SQLITE_REMOVE} {_SQLITE_ADD} END",
+]
+
+# reparo (`python -m mymadr.cli recalcular-estatisticas`)
+RECOMPUTE_NOVELIST_STATS = """
+UPDATE novelists SET
+    book_count = (
+        SELECT count(*) FROM books WHERE novelist_id = novelists.id
+    ),
+    first_year = (
+        SELECT min(year) FROM books WHERE novelist_id = novelists.id
+    ),
+    last_year = (
+        SELECT max(year) FROM books WHERE novelist_id = novelists.id
+    )
+"""
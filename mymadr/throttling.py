@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from http import HTTPStatus
+from math import ceil
+from time import monotonic
+
+from fastapi import HTTPException, Request
+
+from mymadr.messages import ResponseMessage
+from mymadr.settings import settings
+
+
+class TokenBucketLimiter:
+    """Limitador token bucket em memória, uma bucket por chave.
+
+    Cada bucket guarda só `(fichas, último acesso)`; as chaves menos
+    usadas são descartadas acima de `max_keys`. `rate <= 0` desliga.
+    """
+
+    def __init__(self, rate: int, period: float, max_keys: int):
+        if period <= 0:
+            # sem reposição o tempo até a próxima ficha seria infinito
+            raise ValueError("O período do limitador deve ser positivo")
+        self.capacity = rate
+        self.refill_per_second = rate / period
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def hit(self, key: str) -> float:
+        """Consome uma ficha de `key`.
+
+        Retorna 0 quando permitido, senão os segundos até a próxima ficha.
+        """
+        if self.capacity <= 0:
+            return 0
+        now = monotonic()
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        tokens = min(
+            self.capacity, tokens + (now - last) * self.refill_per_second
+        )
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            self.rejected += 1
+            return (1 - tokens) / self.refill_per_second
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        self.allowed += 1
+        return 0
+
+    def clear(self):
+        self._buckets.clear()
+        self.allowed = 0
+        self.rejected = 0
+
+    def stats(self) -> dict:
+        return {
+            "limite": self.capacity,
+            "chaves": len(self._buckets),
+            "permitidas": self.allowed,
+            "rejeitadas": self.rejected,
+        }
+
+
+login_email_limiter = TokenBucketLimiter(
+    rate=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+    period=settings.LOGIN_RATE_LIMIT_PERIOD_SECONDS,
+    max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+)
+login_ip_limiter = TokenBucketLimiter(
+    rate=settings.LOGIN_RATE_LIMIT_PER_IP,
+    period=settings.LOGIN_RATE_LIMIT_PERIOD_SECONDS,
+    max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+)
+
+
+def check_login_rate(request: Request, email: str):
+    """Recusa o login com 429 antes de buscar a conta e rodar o argon2."""
+    client_ip = request.client.host if request.client else "desconhecido"
+    retry_after = login_ip_limiter.hit(client_ip) or login_email_limiter.hit(
+        email.lower()
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail=ResponseMessage.AUTH_TOO_MANY_ATTEMPTS,
+            headers={"Retry-After": str(ceil(retry_after))},
+        )
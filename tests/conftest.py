@@ -5,9 +5,31 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from mymadr.app import app
-from mymadr.database import get_session
+from mymadr.autocomplete import suggestion_index
+from mymadr.cache import book_cache, novelist_cache
+from mymadr.database import get_read_session, get_session
 from mymadr.models import Account, Book, Novelist, table_registry
-from mymadr.security import get_password_hash
+from mymadr.revocation import revocation_list
+from mymadr.security import (
+    get_password_hash,
+    payload_cache,
+    principal_cache,
+)
+from mymadr.throttling import login_email_limiter, login_ip_limiter
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # caches em memória não podem vazar entre testes (o banco é recriado)
+    yield
+    principal_cache.clear()
+    payload_cache.clear()
+    login_email_limiter.clear()
+    login_ip_limiter.clear()
+    revocation_list.clear()
+    book_cache.clear()
+    novelist_cache.clear()
+    suggestion_index.clear()
 
 
 @pytest_asyncio.fixture
@@ -17,6 +39,7 @@ async def client(session):
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
@@ -1,6 +1,11 @@
 from http import HTTPStatus
 from time import sleep
 
+import pytest
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from mymadr.security import pwd_context, verify_password
+
 
 def test_create_account_success(client):
     json_input = {
@@ -318,3 +323,49 @@ def test_update_account_with_invalid_email_(client, user, token):
     )
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
     assert "is not a valid email" in response.json()["detail"][0]["msg"]
+
+
+def test_logout_success(client, token):
+    response = client.post(
+        "/logout", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"message": "Sessão encerrada com sucesso"}
+
+
+def test_logout_revokes_token_unauthorized(client, token):
+    client.post("/logout", headers={"Authorization": f"Bearer {token}"})
+    response = client.post(
+        "/refresh-token", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {"message": "Não autorizado"}
+
+
+def test_logout_keeps_other_tokens_valid(client, user, token):
+    other_session = client.post(
+        "/token",
+        data={"username": user.email, "password": user.clean_password},
+    ).json()["access_token"]
+    client.post("/logout", headers={"Authorization": f"Bearer {token}"})
+    response = client.post(
+        "/refresh-token", headers={"Authorization": f"Bearer {other_session}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_stale_parameters(
+    client, session, user
+):
+    weak_hasher = Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1)
+    user.password = weak_hasher.hash(user.clean_password)
+    await session.commit()
+    response = client.post(
+        "/token",
+        data={"username": user.email, "password": user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.OK
+    await session.refresh(user)
+    assert not pwd_context.current_hasher.check_needs_rehash(user.password)
+    assert verify_password(user.clean_password, user.password)
@@ -0,0 +1,182 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.autocomplete import (
+    PrefixIndex,
+    SuggestionIndex,
+    prefix_params,
+    suggestions_query,
+)
+from mymadr.database import build_engine
+from mymadr.models import Book, Novelist, table_registry
+from mymadr.settings import settings
+
+
+def test_prefix_index_returns_sorted_matches_up_to_limit():
+    index = PrefixIndex([
+        ("dom casmurro", "livro", 1),
+        ("dom", "livro", 3),
+        ("dom casmurro", "livro", 2),
+        ("domingos olímpio", "romancista", 1),
+        ("dona guidinha do poço", "livro", 4),
+        ("do", "romancista", 2),
+    ])
+    assert index.search("dom", 10) == [
+        ("dom", "livro", 3),
+        ("dom casmurro", "livro", 1),
+        ("dom casmurro", "livro", 2),
+        ("domingos olímpio", "romancista", 1),
+    ]
+    assert index.search("dom ", 1) == [("dom casmurro", "livro", 1)]
+    assert index.search("x", 10) == []
+
+
+def test_autocomplete_success(client, book1, book3, novelist, other_novelist):
+    response = client.get("/autocompletar", params={"prefixo": "ma"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "sugestoes": [
+            {"tipo": "romancista", "id": novelist.id, "texto": novelist.name},
+            {
+                "tipo": "romancista",
+                "id": other_novelist.id,
+                "texto": other_novelist.name,
+            },
+        ]
+    }
+
+
+def test_autocomplete_sanitizes_prefix_and_mixes_kinds(client, book1):
+    response = client.get(
+        "/autocompletar", params={"prefixo": "  DOM   ca", "limite": 5}
+    )
+    assert response.json() == {
+        "sugestoes": [{"tipo": "livro", "id": book1.id, "texto": book1.title}]
+    }
+
+
+def test_autocomplete_respects_limit(client, book1, book2, novelist):
+    response = client.get(
+        "/autocompletar", params={"prefixo": "m", "limite": 1}
+    )
+    assert response.json()["sugestoes"] == [
+        {"tipo": "romancista", "id": novelist.id, "texto": novelist.name}
+    ]
+
+
+def test_autocomplete_like_wildcards_are_literal(client, book1):
+    response = client.get("/autocompletar", params={"prefixo": "%"})
+    assert response.json() == {"sugestoes": []}
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"prefixo": "   "},
+        {"prefixo": "a", "limite": 0},
+        {"prefixo": "a", "limite": 1000},
+    ],
+)
+def test_autocomplete_invalid_query_unprocessable(client, params):
+    response = client.get("/autocompletar", params=params)
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_autocomplete_memory_index_matches_database(
+    client, book1, book2, book3, monkeypatch
+):
+    catalog_size = 5  # três livros e dois romancistas
+    params = {"prefixo": "m"}
+    from_database = client.get("/autocompletar", params=params).json()
+    monkeypatch.setattr(settings, "AUTOCOMPLETE_MEMORY_INDEX", True)
+    from_memory = client.get("/autocompletar", params=params).json()
+    assert from_memory == from_database
+    metrics = client.get("/metricas/").json()["autocompletar"]
+    assert metrics == {"entradas": catalog_size, "buscas": 1, "recargas": 1}
+
+
+def test_autocomplete_memory_index_refreshed_on_writes(
+    client, novelist, token, monkeypatch
+):
+    monkeypatch.setattr(settings, "AUTOCOMPLETE_MEMORY_INDEX", True)
+    params = {"prefixo": "helena"}
+    assert client.get("/autocompletar", params=params).json() == {
+        "sugestoes": []
+    }
+    response = client.post(
+        "livro",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"titulo": "Helena", "ano": 1876, "romancista_id": novelist.id},
+    )
+    suggestions = client.get("/autocompletar", params=params).json()
+    assert suggestions == {
+        "sugestoes": [
+            {"tipo": "livro", "id": response.json()["id"], "texto": "helena"}
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_suggestion_index_reloads_only_when_stale(session, book1):
+    loads_after_write = 2
+    index = SuggestionIndex(refresh_seconds=60)
+    await index.search(session, "dom", 10)
+    await index.search(session, "dom", 10)
+    assert index.stats()["recargas"] == 1
+    index.invalidate()
+    assert await index.search(session, "dom", 10) == [
+        (book1.title, "livro", book1.id)
+    ]
+    assert index.stats()["recargas"] == loads_after_write
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_uses_prefix_indexes(session, book1):
+    query = suggestions_query("postgresql").params(prefix_params("dom", 10))
+    sql = query.compile(session.bind, compile_kwargs={"literal_binds": True})
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join((await session.execute(text(f"EXPLAIN {sql}"))).scalars())
+    await session.rollback()
+    assert "Seq Scan" not in plan
+    assert "ix_books_title_prefix" in plan
+    assert "ix_novelists_name_prefix" in plan
+
+
+@pytest.mark.asyncio
+async def test_sqlite_suggestions_query(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    # sem o dispose, uma falha deixa a thread do aiosqlite presa
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            novelist = Novelist(name="machado de assis")
+            session.add(novelist)
+            await session.flush()
+            book = Book(
+                title="memorial de aires", year=1908, novelist_id=novelist.id
+            )
+            session.add_all([
+                book,
+                Book(title="dom casmurro", year=1899, novelist_id=novelist.id),
+            ])
+            await session.commit()
+            query = suggestions_query("sqlite")
+            rows = await session.execute(query, prefix_params("m", 10))
+            assert rows.all() == [
+                ("machado de assis", "romancista", novelist.id),
+                ("memorial de aires", "livro", book.id),
+            ]
+            sql = query.params(prefix_params("m", 10)).compile(
+                engine.sync_engine, compile_kwargs={"literal_binds": True}
+            )
+            plan = await session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+            details = " ".join(row.detail for row in plan)
+            assert "ix_books_title_id" in details
+            assert "sqlite_autoindex_novelists" in details
+    finally:
+        await engine.dispose()
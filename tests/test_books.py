@@ -1,7 +1,26 @@
+import csv
+import io
+import json
 from http import HTTPStatus
 
+import factory
 import pytest
-
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.cache import book_cache
+from mymadr.database import build_engine
+from mymadr.models import Book, Novelist, table_registry
+from mymadr.pagination import page_params, paginate, sort_keys
+from mymadr.routers.books import (
+    BOOK_ORDER,
+    BOOK_SORT_COLUMNS,
+    books_query,
+    facet_buckets,
+    facets_query,
+)
+from mymadr.search import search_mode, substring_pattern
+from mymadr.settings import settings
 from tests.factories import BookFactory
 
 
@@ -52,6 +71,108 @@ def test_get_book_by_id_success(client, book1):
     }
 
 
+def test_get_book_by_id_is_served_from_cache(client, engine, book1):
+    statements = []
+
+    def track(conn, cursor, statement, *args):
+        if "books" in statement:
+            statements.append(statement.split()[0])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", track)
+    try:
+        first = client.get(f"livro/{book1.id}")
+        second = client.get(f"livro/{book1.id}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", track)
+    assert first.json() == second.json()
+    assert statements == ["SELECT"]
+
+
+def test_get_book_from_replica_is_not_cached(client, session, book1):
+    session.info["replica"] = True
+    response = client.get(f"livro/{book1.id}")
+    assert response.status_code == HTTPStatus.OK
+    assert book_cache.stats()["tamanho"] == 0
+
+
+def test_update_book_invalidates_cache(client, book1, token):
+    new_year = 1900
+    client.get(f"livro/{book1.id}")
+    client.patch(
+        f"livro/{book1.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"ano": new_year},
+    )
+    response = client.get(f"livro/{book1.id}")
+    assert response.json()["ano"] == new_year
+
+
+def test_delete_book_invalidates_cache(client, book1, token):
+    client.get(f"livro/{book1.id}")
+    client.delete(
+        f"livro/{book1.id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    response = client.get(f"livro/{book1.id}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_book_by_id_not_modified(client, book1):
+    response = client.get(f"livro/{book1.id}")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+    assert etag == f'"{book1.id}-1"'
+    response = client.get(f"livro/{book1.id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+    response = client.get(
+        f"livro/{book1.id}", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_update_book_changes_etag(client, book1, token):
+    etag = client.get(f"livro/{book1.id}").headers["ETag"]
+    client.patch(
+        f"livro/{book1.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"titulo": "novo titulo"},
+    )
+    response = client.get(f"livro/{book1.id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] == f'"{book1.id}-2"'
+
+
+def test_query_books_not_modified(client, book1, book2, token):
+    etag = client.get("livro/").headers["ETag"]
+    response = client.get("livro/", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    client.delete(
+        f"livro/{book2.id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    response = client.get("livro/", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] != etag
+
+
+def test_get_book_by_id_expanded_success(client, book1, novelist):
+    response = client.get(f"livro/{book1.id}?expandir=romancista")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "titulo": book1.title,
+        "ano": book1.year,
+        "romancista_id": novelist.id,
+        "id": book1.id,
+        "romancista": {"nome": novelist.name, "id": novelist.id},
+    }
+    assert response.headers["ETag"] == f'"{book1.id}-1-1"'
+
+
+def test_get_book_by_id_invalid_expand_unprocessable(client, book1):
+    response = client.get(f"livro/{book1.id}?expandir=livros")
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 def test_get_book_by_id_when_book_does_not_exist_not_found(client, book1):
     response = client.get(f"livro/{book1.id + 1}")
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -70,7 +191,12 @@ def test_query_book_by_partial_title_success(client, book1, book2, book3):
                 "romancista_id": book1.novelist_id,
                 "id": book1.id,
             }
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
     }
 
 
@@ -85,7 +211,12 @@ def test_query_book_by_year_success(client, book1, book2, book3):
                 "romancista_id": book1.novelist_id,
                 "id": book1.id,
             }
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
     }
 
 
@@ -106,7 +237,12 @@ def test_query_book_by_novelist_id_success(client, book1, book2, book3):
                 "romancista_id": book2.novelist_id,
                 "id": book2.id,
             },
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
     }
 
 
@@ -114,7 +250,14 @@ def test_query_book_by_no_matches_return_empty_list(client, book1):
     partial_name = "úrsula"  # dom casmurro
     response = client.get(f"livro/?titulo={partial_name}")
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {"livros": []}
+    assert response.json() == {
+        "livros": [],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
+    }
 
 
 def test_update_book_title_success(client, book1, token):
@@ -275,6 +418,37 @@ def test_delete_book_success(client, book1, token):
     assert response.json() == {"message": "Livro deletado no MADR"}
 
 
+def test_delete_book_when_book_does_not_exist_not_found(client, book1, token):
+    response = client.delete(
+        f"livro/{book1.id + 1}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {"message": "Livro não consta no MADR"}
+
+
+def test_book_writes_use_one_statement_each(client, engine, novelist, token):
+    statements = []
+
+    def track(conn, cursor, statement, *args):
+        if "books" in statement:
+            statements.append(statement.split()[0])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", track)
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        book_id = client.post(
+            "livro/",
+            headers=headers,
+            json={"titulo": "livro", "ano": 2000, "romancista_id": 1},
+        ).json()["id"]
+        client.patch(f"livro/{book_id}", headers=headers, json={"ano": 2001})
+        client.delete(f"livro/{book_id}", headers=headers)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", track)
+    assert statements == ["INSERT", "UPDATE", "DELETE"]
+
+
 def test_delete_book_not_authenticated_unauthorized(client, book1):
     response = client.delete(
         f"livro/{book1.id}",
@@ -296,9 +470,9 @@ def test_delete_book_invalid_token_unauthorized(client, book1):
 async def test_book_pagination_size_first_page_returns_20_of_30_books(
     session, client, novelist
 ):
-    """test pagination (max size 20 books per page):
+    """test pagination (default size 20 books per page):
     has 30 books
-    expects 20 of 30 books in response
+    expects 20 of 30 books in response and a cursor to the next page
     """
     books_quantity = 30
     default_page_size = 20
@@ -307,28 +481,163 @@ async def test_book_pagination_size_first_page_returns_20_of_30_books(
         BookFactory.create_batch(books_quantity, novelist_id=novelist.id)
     )
     await session.commit()
-    response = client.get("livro/?")  # <- page not provided
+    response = client.get("livro/?")  # <- cursor not provided
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()["livros"]) == len_expected
+    assert response.json()["has_more"] is True
+    assert response.json()["proximo"] is not None
 
 
 @pytest.mark.asyncio
 async def test_book_pagination_size_second_page_returns_10_of_30_books(
     session, client, novelist
 ):
-    """test pagination - 2nd page (max size 20 books per page):
+    """test pagination - 2nd page (default size 20 books per page):
     has 30 books
-    expects 10 of 30 books in response
+    expects 10 of 30 books in response following the cursor
     """
     books_quantity = 30
     default_page_size = 20
-    page = 2
     len_expected = books_quantity - default_page_size
     session.add_all(BookFactory.create_batch(books_quantity))
     await session.commit()
-    response = client.get(f"livro/?pagina={page}")
+    first_page = client.get("livro/").json()
+    response = client.get("livro/", params={"cursor": first_page["proximo"]})
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()["livros"]) == len_expected
+    assert response.json()["has_more"] is False
+    assert response.json()["proximo"] is None
+    ids = [
+        book["id"] for book in first_page["livros"] + response.json()["livros"]
+    ]
+    assert ids == sorted(set(ids))
+
+
+@pytest.mark.asyncio
+async def test_book_pagination_walks_whole_catalog_with_page_size(
+    session, client, novelist
+):
+    books_quantity = 25
+    page_size = 7
+    session.add_all(BookFactory.create_batch(books_quantity))
+    await session.commit()
+    seen, params = [], {"tamanho": page_size}
+    while True:
+        response = client.get("livro/", params=params).json()
+        seen.extend(book["id"] for book in response["livros"])
+        if not response["has_more"]:
+            break
+        params["cursor"] = response["proximo"]
+    assert len(seen) == books_quantity
+    assert seen == sorted(set(seen))
+
+
+def test_book_pagination_page_size_is_capped(client):
+    response = client.get("livro/", params={"tamanho": 10_000})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_book_pagination_invalid_cursor_bad_request(client, book1):
+    response = client.get("livro/", params={"cursor": "nao-e-um-cursor"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {"message": "Cursor de paginação inválido"}
+
+
+@pytest.mark.parametrize(
+    ("order", "expected"),
+    [
+        ("ano", ["úrsula", "missa do galo", "dom casmurro"]),
+        ("-ano", ["dom casmurro", "missa do galo", "úrsula"]),
+        ("titulo", ["dom casmurro", "missa do galo", "úrsula"]),
+        ("-id", ["úrsula", "missa do galo", "dom casmurro"]),
+    ],
+)
+@pytest.mark.usefixtures("book1", "book2", "book3")
+def test_query_books_sorted(client, order, expected):
+    response = client.get("livro/", params={"ordenar": order})
+    assert response.status_code == HTTPStatus.OK
+    assert [book["titulo"] for book in response.json()["livros"]] == expected
+
+
+@pytest.mark.asyncio
+async def test_book_pagination_walks_catalog_in_mixed_order(
+    session, client, novelist
+):
+    books_quantity = 25
+    page_size = 4
+    session.add_all(
+        BookFactory.create_batch(
+            books_quantity, year=factory.Iterator([2001, 2000, 2002])
+        )
+    )
+    await session.commit()
+    seen, params = [], {"tamanho": page_size, "ordenar": "ano,-titulo"}
+    while True:
+        response = client.get("livro/", params=params).json()
+        seen.extend(
+            (book["ano"], book["titulo"]) for book in response["livros"]
+        )
+        if not response["has_more"]:
+            break
+        params["cursor"] = response["proximo"]
+    assert len(seen) == books_quantity
+    by_title = sorted(seen, key=lambda book: book[1], reverse=True)
+    assert seen == sorted(by_title, key=lambda book: book[0])
+
+
+@pytest.mark.parametrize(
+    ("params", "expected"),
+    [
+        ({"ano_min": 1890}, ["dom casmurro", "missa do galo"]),
+        ({"ano_max": 1893}, ["missa do galo", "úrsula"]),
+        ({"ano_min": 1860, "ano_max": 1895}, ["missa do galo"]),
+        ({"ano_min": 1900}, []),
+    ],
+)
+@pytest.mark.usefixtures("book1", "book2", "book3")
+def test_query_books_year_range(client, params, expected):
+    response = client.get("livro/", params=params | {"ordenar": "titulo"})
+    assert response.status_code == HTTPStatus.OK
+    assert [book["titulo"] for book in response.json()["livros"]] == expected
+
+
+@pytest.mark.parametrize("order", ["autor", "ano,-ano", "-", "romancista_id"])
+def test_query_books_invalid_order_unprocessable(client, order):
+    response = client.get("livro/", params={"ordenar": order})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("order", "filters", "index"),
+    [
+        ("titulo", {}, "ix_books_title_id"),
+        ("-titulo", {}, "ix_books_title_id"),
+        ("ano", {}, "ix_books_year_id"),
+        (None, {"year_min": 1890, "year_max": 1900}, "ix_books_year_id"),
+        (
+            None,
+            {"novelist_id": 1, "year_min": 1890},
+            "ix_books_novelist_id_year",
+        ),
+    ],
+)
+async def test_book_sort_and_range_use_an_index(
+    session, book1, order, filters, index
+):
+    keys = sort_keys(order, BOOK_SORT_COLUMNS, Book.id)
+    query = paginate(books_query(None, frozenset(filters)), keys, False)
+    sql = query.params(filters, limit=21).compile(
+        session.bind, compile_kwargs={"literal_binds": True}
+    )
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join((await session.execute(text(f"EXPLAIN {sql}"))).scalars())
+    await session.rollback()
+    assert "Seq Scan" not in plan
+    assert index in plan
+    if order:
+        # a ordem vem do índice, sem etapa de Sort
+        assert "Sort" not in plan
 
 
 def test_book_title_sanitization_on_registry(client, token, novelist):
@@ -369,3 +678,312 @@ def test_book_title_sanitization_on_update(client, book1, token, novelist):
     )
     assert response.json() == json_output
     assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({}, "books_pkey"),
+        ({"novelist_id": 1}, "ix_books_novelist_id_year"),
+        ({"novelist_id": 1, "year": 1899}, "ix_books_novelist_id_year"),
+        ({"year": 1899}, "ix_books_year_id"),
+        ({"title": "casm"}, "ix_books_title_trgm"),
+        ({"title": "casm", "year": 1899}, "ix_books_"),
+        ({"title": "casm", "novelist_id": 1}, "ix_books_"),
+        ({"title": "casm", "year": 1899, "novelist_id": 1}, "ix_books_"),
+    ],
+)
+async def test_book_filter_combinations_use_an_index(
+    session, book1, filters, index
+):
+    # a mesma página que `query_books` executa para cada combinação
+    params = page_params(BOOK_ORDER, None, settings.PAGE_SIZE_DEFAULT)
+    values = dict(filters)
+    mode = None
+    if "title" in values:
+        mode = search_mode("postgresql", values["title"])
+        values["title"] = substring_pattern(mode, values["title"])
+    query = paginate(
+        books_query(mode, frozenset(filters.keys() - {"title"})),
+        BOOK_ORDER,
+        False,
+    )
+    sql = query.params(params | values).compile(
+        session.bind, compile_kwargs={"literal_binds": True}
+    )
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join((await session.execute(text(f"EXPLAIN {sql}"))).scalars())
+    await session.rollback()
+    assert "Seq Scan" not in plan
+    assert index in plan
+
+
+@pytest.mark.asyncio
+async def test_book_query_with_count_returns_exact_total(
+    session, client, novelist
+):
+    books_quantity = 5
+    session.add_all(BookFactory.create_batch(books_quantity))
+    await session.commit()
+    response = client.get("livro/", params={"contar": True, "tamanho": 2})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["total"] == books_quantity
+    assert response.json()["total_estimado"] is False
+
+
+@pytest.mark.asyncio
+async def test_book_query_with_count_estimates_large_totals(
+    session, client, novelist, monkeypatch
+):
+    books_quantity = 5
+    session.add_all(BookFactory.create_batch(books_quantity))
+    await session.commit()
+    monkeypatch.setattr(settings, "COUNT_EXACT_THRESHOLD", 2)
+    response = client.get("livro/", params={"contar": True, "ano": 2025})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["total_estimado"] is True
+    assert response.json()["total"] >= 1
+
+
+def test_register_books_batch_success(client, novelist, token):
+    response = client.post(
+        "/livro/lote",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "livros": [
+                {"titulo": "Dom Casmurro", "ano": 1899, "romancista_id": 1},
+                {
+                    "titulo": "a hora da estrela",
+                    "ano": 1977,
+                    "romancista": "Clarice  Lispector",
+                },
+                {
+                    "titulo": "sem romancista",
+                    "ano": 2000,
+                    "romancista_id": 999,
+                },
+                {
+                    "titulo": "água viva",
+                    "ano": 1973,
+                    "romancista": "clarice lispector",
+                },
+            ]
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()["resultados"]
+    assert [result["status"] for result in results] == [
+        "criado",
+        "criado",
+        "erro",
+        "criado",
+    ]
+    assert results[2] == {
+        "indice": 2,
+        "id": None,
+        "status": "erro",
+        "mensagem": "Romancista não consta no MADR",
+    }
+    book = client.get(f"/livro/{results[1]['id']}").json()
+    assert book["titulo"] == "a hora da estrela"
+    other = client.get(f"/livro/{results[3]['id']}").json()
+    assert other["romancista_id"] == book["romancista_id"] != novelist.id
+
+
+def test_register_books_batch_requires_one_novelist_reference(client, token):
+    response = client.post(
+        "/livro/lote",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"livros": [{"titulo": "livro", "ano": 2000}]},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_register_books_batch_large_load(client, novelist, token):
+    books_quantity = 2500
+    response = client.post(
+        "/livro/lote",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "livros": [
+                {
+                    "titulo": f"livro {i}",
+                    "ano": 2000,
+                    "romancista": f"autor {i % 7}",
+                }
+                for i in range(books_quantity)
+            ]
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    ids = [result["id"] for result in response.json()["resultados"]]
+    assert len(set(ids)) == books_quantity
+    book = client.get(f"/livro/{ids[-1]}").json()
+    assert book["titulo"] == f"livro {books_quantity - 1}"
+
+
+def test_export_books_ndjson(client, book1, book2, book3):
+    response = client.get("/livro/export")
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {
+            "id": book.id,
+            "titulo": book.title,
+            "ano": book.year,
+            "romancista_id": book.novelist_id,
+        }
+        for book in (book1, book2, book3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_books_csv_streams_whole_catalog(
+    session, client, novelist, monkeypatch
+):
+    books_quantity = 25
+    monkeypatch.setattr(settings, "EXPORT_FETCH_SIZE", 10)
+    session.add_all(BookFactory.create_batch(books_quantity))
+    await session.commit()
+    response = client.get("/livro/export", params={"formato": "csv"})
+    assert response.status_code == HTTPStatus.OK
+    assert "livros.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == books_quantity
+    assert rows[0].keys() == {"id", "titulo", "ano", "romancista_id"}
+    assert [int(row["id"]) for row in rows] == sorted(
+        int(row["id"]) for row in rows
+    )
+
+
+def test_books_query_shapes_are_cached_with_bound_parameters():
+    year = frozenset({"year"})
+    assert books_query("like", year) is books_query("like", year)
+    sql = str(books_query("like", year | {"novelist_id"}))
+    assert ":title" in sql
+    assert ":year" in sql
+    assert ":novelist_id" in sql
+
+
+def test_query_books_expanded_loads_novelists_once_per_page(
+    client, engine, book1, book2, book3
+):
+    statements = []
+
+    def track(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", track)
+    try:
+        response = client.get("livro/?expandir=romancista")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", track)
+    assert response.status_code == HTTPStatus.OK
+    assert [
+        book["romancista"]["id"] for book in response.json()["livros"]
+    ] == [
+        book1.novelist_id,
+        book2.novelist_id,
+        book3.novelist_id,
+    ]
+    assert statements == ["SELECT", "SELECT"]
+
+
+def test_query_books_not_expanded_has_no_novelist(client, book1):
+    response = client.get("livro/")
+    assert "romancista" not in response.json()["livros"][0]
+
+
+def test_query_books_facets_success(
+    client, novelist, other_novelist, book1, book3
+):
+    response = client.get("livro/?facetas=ano,romancista")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["facetas"] == {
+        "ano": [
+            {"ano": book3.year, "total": 1},
+            {"ano": book1.year, "total": 1},
+        ],
+        "romancista": [
+            {"romancista_id": novelist.id, "nome": novelist.name, "total": 1},
+            {
+                "romancista_id": other_novelist.id,
+                "nome": other_novelist.name,
+                "total": 1,
+            },
+        ],
+    }
+
+
+def test_query_books_facets_are_one_query(client, engine, book1):
+    statements = []
+
+    def track(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(engine.sync_engine, "before_cursor_execute", track)
+    try:
+        client.get("livro/?facetas=ano,romancista")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", track)
+    # a página e todas as facetas
+    assert statements == ["SELECT", "SELECT"]
+
+
+def test_query_books_facets_follow_filters(client, novelist, book1, book2):
+    response = client.get(
+        "livro/",
+        params={"titulo": "dom", "facetas": ["ano", "romancista"]},
+    )
+    assert response.json()["facetas"] == {
+        "ano": [{"ano": book1.year, "total": 1}],
+        "romancista": [
+            {"romancista_id": novelist.id, "nome": novelist.name, "total": 1}
+        ],
+    }
+
+
+def test_query_books_single_facet(client, book1):
+    response = client.get("livro/?facetas=ano")
+    assert response.json()["facetas"] == {
+        "ano": [{"ano": book1.year, "total": 1}],
+        "romancista": None,
+    }
+
+
+def test_query_books_invalid_facet_unprocessable(client):
+    response = client.get("livro/?facetas=titulo")
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_sqlite_facets_query(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        novelist = Novelist(name="machado de assis")
+        session.add(novelist)
+        await session.flush()
+        session.add_all([
+            Book(title="dom casmurro", year=1899, novelist_id=novelist.id),
+            Book(title="missa do galo", year=1899, novelist_id=novelist.id),
+        ])
+        await session.commit()
+        rows = await session.execute(
+            facets_query("fts", frozenset(), ("ano", "romancista")),
+            {"title": "%a%"},
+        )
+        assert facet_buckets(rows) == {
+            "ano": [{"ano": 1899, "total": 2}],
+            "romancista": [
+                {
+                    "romancista_id": novelist.id,
+                    "nome": novelist.name,
+                    "total": 2,
+                }
+            ],
+        }
+    await engine.dispose()
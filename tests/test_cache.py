@@ -0,0 +1,69 @@
+import pytest
+
+from mymadr.cache import MemoryCacheBackend, TTLCache
+
+
+def test_ttl_cache_get_and_set_success():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["acertos"] == 1
+    assert cache.stats()["falhas"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", "c")
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == "c"
+
+
+def test_ttl_cache_expired_entry_is_a_miss():
+    cache = TTLCache(maxsize=2, ttl=0.000001)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_disabled_when_ttl_is_zero():
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["tamanho"] == 0
+
+
+def test_ttl_cache_invalidate_and_clear():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.stats()["tamanho"] == 0
+
+
+def test_ttl_cache_invalidate_all_keeps_counters():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.invalidate_all()
+    assert cache.get("a") is None
+    assert cache.stats()["acertos"] == 1
+    assert cache.stats()["tamanho"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_backend_success():
+    cache = MemoryCacheBackend(maxsize=2, ttl=60)
+    await cache.set(1, {"id": 1})
+    assert await cache.get(1) == {"id": 1}
+    await cache.invalidate(1)
+    assert await cache.get(1) is None
+    await cache.set(2, {"id": 2})
+    await cache.invalidate_all()
+    assert await cache.get(2) is None
+    assert cache.stats()["taxa_acerto"] == round(1 / 3, 4)
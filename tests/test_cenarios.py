@@ -384,7 +384,12 @@ def test_filtro_de_livros(client, token, novelist, other_novelist):
                 "romancista_id": 2,
                 "id": 2,
             },
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
     }
     client.post(
         "livro", headers={"Authorization": f"Bearer {token}"}, json=input1
@@ -515,7 +520,11 @@ def test_buscar_de_romancistas_por_filtro(client, token):
             {"nome": "clarice lispector", "id": 1},
             {"nome": "manuel bandeira", "id": 2},
             {"nome": "paulo leminski", "id": 3},
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
     }
     client.post(
         "romancista", headers={"Authorization": f"Bearer {token}"}, json=input1
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import select, update
+
+from mymadr.cli import (
+    MIN_MEMORY_COST,
+    benchmark_filters,
+    calibrate_argon2,
+    main,
+    recompute_stats,
+    write_env,
+)
+from mymadr.models import Novelist
+
+
+def fake_bench(time_cost, memory_cost, parallelism):
+    # ~10 ms por iteração a cada 64 MiB
+    return time_cost * 10 * memory_cost / 65536
+
+
+def test_calibrate_argon2_picks_largest_time_cost_under_target():
+    params = calibrate_argon2(45, 65536, 4, bench=fake_bench)
+    assert params == {
+        "ARGON2_TIME_COST": 4,
+        "ARGON2_MEMORY_COST": 65536,
+        "ARGON2_PARALLELISM": 4,
+    }
+
+
+def test_calibrate_argon2_reduces_memory_when_target_is_too_low():
+    params = calibrate_argon2(1, 65536, 4, bench=fake_bench)
+    assert params["ARGON2_TIME_COST"] == 1
+    assert params["ARGON2_MEMORY_COST"] == MIN_MEMORY_COST
+
+
+def test_write_env_updates_and_appends(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text('SECRET_KEY="x"\nARGON2_TIME_COST=3\n')
+    write_env(env_file, {"ARGON2_TIME_COST": 5, "ARGON2_PARALLELISM": 2})
+    assert env_file.read_text() == (
+        'SECRET_KEY="x"\nARGON2_TIME_COST=5\nARGON2_PARALLELISM=2\n'
+    )
+
+
+def test_cli_calibrar_argon2_writes_env(tmp_path, capsys):
+    env_file = tmp_path / ".env"
+    main([
+        "calibrar-argon2",
+        "--alvo-ms",
+        "1",
+        "--memoria-kib",
+        str(MIN_MEMORY_COST),
+        "--paralelismo",
+        "1",
+        "--env-file",
+        str(env_file),
+    ])
+    assert "ARGON2_TIME_COST=" in capsys.readouterr().out
+    assert "ARGON2_MEMORY_COST=8192" in env_file.read_text()
+
+
+@pytest.mark.asyncio
+async def test_benchmark_filters_reports_both_modes(session, engine):
+    url = engine.url.render_as_string(hide_password=False)
+    results = await benchmark_filters(url, rounds=1)
+    assert set(results) == {"sem_cache", "com_cache"}
+    assert all(latency > 0 for latency in results.values())
+
+
+@pytest.mark.asyncio
+async def test_recompute_stats_repairs_counts(session, engine, book1):
+    await session.execute(update(Novelist).values(book_count=0))
+    await session.commit()
+    url = engine.url.render_as_string(hide_password=False)
+    assert await recompute_stats(url) == 1
+    book_count = await session.scalar(
+        select(Novelist.book_count).execution_options(populate_existing=True)
+    )
+    assert book_count == 1
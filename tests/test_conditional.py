@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Request
+
+from mymadr.conditional import http_date, is_not_modified, list_tag
+
+LAST_MODIFIED = "Sun, 18 Oct 2026 12:00:00 GMT"
+
+
+def _request(headers: dict[str, str]) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in headers.items()
+        ],
+    })
+
+
+def test_http_date_treats_naive_datetime_as_utc():
+    naive = datetime(2026, 10, 18, 12)
+    aware = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    assert http_date(naive) == http_date(aware) == LAST_MODIFIED
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, False),
+        ({"If-None-Match": '"1-2"'}, True),
+        ({"If-None-Match": 'W/"1-2"'}, True),
+        ({"If-None-Match": '"1-1", "1-2"'}, True),
+        ({"If-None-Match": "*"}, True),
+        ({"If-None-Match": '"1-1"'}, False),
+        # If-None-Match tem precedência
+        (
+            {"If-None-Match": '"1-1"', "If-Modified-Since": LAST_MODIFIED},
+            False,
+        ),
+        ({"If-Modified-Since": LAST_MODIFIED}, True),
+        ({"If-Modified-Since": "Sun, 18 Oct 2026 11:59:59 GMT"}, False),
+        ({"If-Modified-Since": "data inválida"}, False),
+    ],
+)
+def test_is_not_modified(headers, expected):
+    request = _request(headers)
+    assert is_not_modified(request, '"1-2"', LAST_MODIFIED) is expected
+
+
+def test_list_tag_changes_with_versions_and_extra():
+    class Item:
+        def __init__(self, id, version):
+            self.id = id
+            self.version = version
+
+    tag = list_tag([Item(1, 1)], None)
+    assert tag.startswith('W/"')
+    assert tag == list_tag([Item(1, 1)], None)
+    assert tag != list_tag([Item(1, 2)], None)
+    assert tag != list_tag([Item(1, 1)], "cursor")
@@ -0,0 +1,156 @@
+import asyncio
+from http import HTTPStatus
+from itertools import cycle
+from time import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from mymadr import database
+from mymadr.database import (
+    CONSISTENCY_HEADER,
+    TimedQueuePool,
+    build_engine,
+    is_sqlite_file,
+    optimize_sqlite,
+    pool_stats,
+    prepare_connect_args,
+    read_engine,
+    sqlite_maintenance,
+)
+
+
+def test_build_engine_sqlite_memory_keeps_default_pool():
+    engine = build_engine("sqlite+aiosqlite:///:memory:")
+    assert not isinstance(engine.pool, TimedQueuePool)
+    assert pool_stats(engine) == {"pool": "StaticPool"}
+
+
+@pytest.mark.asyncio
+async def test_build_engine_pool_stats_track_checkouts(engine):
+    url = engine.url.render_as_string(hide_password=False)
+    timed_engine = build_engine(url)
+    async with timed_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        in_use = pool_stats(timed_engine)
+    stats = pool_stats(timed_engine)
+    await timed_engine.dispose()
+    assert in_use["em_uso"] == 1
+    assert stats["em_uso"] == 0
+    assert stats["ociosas"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 0
+
+
+def test_read_engine_without_replicas_uses_primary():
+    assert read_engine() is database.engine
+
+
+def test_read_engine_routes_reads_to_replicas(monkeypatch):
+    replicas = ["replica-1", "replica-2"]
+    monkeypatch.setattr(database, "replica_engines", replicas)
+    monkeypatch.setattr(database, "_replicas", cycle(replicas))
+    assert [read_engine(), read_engine(), read_engine()] == [
+        "replica-1",
+        "replica-2",
+        "replica-1",
+    ]
+
+
+def test_read_engine_honors_recent_consistency_token(monkeypatch):
+    replicas = ["replica-1"]
+    monkeypatch.setattr(database, "replica_engines", replicas)
+    monkeypatch.setattr(database, "_replicas", cycle(replicas))
+    assert read_engine(str(time())) is database.engine
+    assert read_engine(str(time() - 3600)) == "replica-1"
+    assert read_engine("invalid") is database.engine
+
+
+@pytest.mark.parametrize("token", ["9e99", "inf", "nan"])
+def test_read_engine_ignores_future_consistency_token(monkeypatch, token):
+    replicas = ["replica-1"]
+    monkeypatch.setattr(database, "replica_engines", replicas)
+    monkeypatch.setattr(database, "_replicas", cycle(replicas))
+    assert read_engine(token) == "replica-1"
+
+
+def test_write_returns_consistency_token(client, token):
+    response = client.post(
+        "/romancista/",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"nome": "clarice lispector"},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert float(response.headers[CONSISTENCY_HEADER]) <= time()
+
+
+def test_read_does_not_return_consistency_token(client, novelist):
+    response = client.get(f"/romancista/{novelist.id}")
+    assert CONSISTENCY_HEADER not in response.headers
+
+
+def test_is_sqlite_file():
+    assert is_sqlite_file("sqlite+aiosqlite:///madr.db")
+    assert not is_sqlite_file("sqlite+aiosqlite:///:memory:")
+    assert not is_sqlite_file("postgresql+psycopg://u:p@localhost/db")
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_sets_pragmas(tmp_path):
+    writer = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    async with writer.connect() as conn:
+        journal_mode = await conn.exec_driver_sql("PRAGMA journal_mode")
+        synchronous = await conn.exec_driver_sql("PRAGMA synchronous")
+        foreign_keys = await conn.exec_driver_sql("PRAGMA foreign_keys")
+        assert journal_mode.scalar() == "wal"
+        assert synchronous.scalar() == 1  # NORMAL
+        assert foreign_keys.scalar() == 1
+    assert writer.pool.size() == 1
+    await optimize_sqlite(writer)
+    await writer.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_maintenance_survives_errors(monkeypatch, caplog):
+    runs = asyncio.Event()
+    calls = []
+
+    async def flaky_optimize(sqlite_engine):
+        calls.append(sqlite_engine)
+        if len(calls) == 1:
+            raise OperationalError("PRAGMA optimize", {}, Exception("busy"))
+        runs.set()
+
+    monkeypatch.setattr(database, "optimize_sqlite", flaky_optimize)
+    task = asyncio.create_task(sqlite_maintenance("writer", interval=0))
+    await asyncio.wait_for(runs.wait(), timeout=5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert "PRAGMA optimize falhou" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_reader_pool_is_read_only(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}"
+    writer = build_engine(url)
+    reader = build_engine(url, read_only=True)
+    async with writer.begin() as conn:
+        await conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+        await conn.exec_driver_sql("INSERT INTO t VALUES (1)")
+    async with reader.connect() as conn:
+        result = await conn.exec_driver_sql("SELECT x FROM t")
+        assert result.scalar() == 1
+        with pytest.raises(OperationalError):
+            await conn.exec_driver_sql("INSERT INTO t VALUES (2)")
+    assert reader.pool.size() > 1
+    await reader.dispose()
+    await writer.dispose()
+
+
+def test_prepare_connect_args_only_for_psycopg():
+    assert prepare_connect_args("postgresql+psycopg://u:p@h/db", 0) == {
+        "prepare_threshold": 0
+    }
+    assert prepare_connect_args("sqlite+aiosqlite:///madr.db", 0) == {}
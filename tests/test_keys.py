@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt import decode, encode, get_unverified_header
+
+from mymadr.keys import SigningKeySet
+
+
+def _write_key(keys_dir, kid, private_key, public_only=False):
+    if public_only:
+        (keys_dir / f"{kid}.pub.pem").write_bytes(
+            private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+        return
+    (keys_dir / f"{kid}.pem").write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "generate"),
+    [
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate),
+        ("ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+    ],
+)
+def test_key_set_sign_and_verify_with_kid(tmp_path, algorithm, generate):
+    _write_key(tmp_path, "k1", generate())
+    key_set = SigningKeySet(algorithm, "unused", str(tmp_path), "k1")
+    kid, key = key_set.signing_key()
+    token = encode({"sub": "a@a"}, key, algorithm, headers={"kid": kid})
+    assert get_unverified_header(token)["kid"] == "k1"
+    payload = decode(token, key_set.verification_key("k1"), [algorithm])
+    assert payload["sub"] == "a@a"
+
+
+def test_key_set_rotation_keeps_retired_keys_for_verification(tmp_path):
+    old_key = ed25519.Ed25519PrivateKey.generate()
+    _write_key(tmp_path, "old", old_key, public_only=True)
+    _write_key(tmp_path, "new", ed25519.Ed25519PrivateKey.generate())
+    key_set = SigningKeySet("EdDSA", "unused", str(tmp_path), "new")
+    token = encode({"sub": "a@a"}, old_key, "EdDSA", headers={"kid": "old"})
+    assert decode(token, key_set.verification_key("old"), ["EdDSA"])
+    assert key_set.signing_key()[0] == "new"
+    jwks = key_set.jwks()["keys"]
+    assert {jwk["kid"] for jwk in jwks} == {"old", "new"}
+    assert all(jwk["alg"] == "EdDSA" and "d" not in jwk for jwk in jwks)
+
+
+def test_key_set_unknown_kid_raises_key_error(tmp_path):
+    _write_key(tmp_path, "k1", ed25519.Ed25519PrivateKey.generate())
+    key_set = SigningKeySet("EdDSA", "unused", str(tmp_path), "k1")
+    with pytest.raises(KeyError):
+        key_set.verification_key("other")
+
+
+def test_key_set_missing_active_kid_raises_value_error(tmp_path):
+    with pytest.raises(ValueError, match="não encontrada"):
+        SigningKeySet("EdDSA", "unused", str(tmp_path), "k1")
+
+
+def test_key_set_hmac_uses_secret_key():
+    key_set = SigningKeySet("HS256", "secret")
+    assert key_set.signing_key() == (None, "secret")
+    assert key_set.verification_key(None) == "secret"
+    assert key_set.jwks() == {"keys": []}
+
+
+def test_get_jwks_endpoint_success(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"keys": []}
+    assert "max-age" in response.headers["Cache-Control"]
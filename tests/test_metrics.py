@@ -0,0 +1,27 @@
+from http import HTTPStatus
+
+
+def test_get_metrics_password_pool_success(client, token):
+    response = client.get("/metricas/")
+    assert response.status_code == HTTPStatus.OK
+    password_stats = response.json()["senhas"]
+    assert password_stats["em_fila"] == 0
+    assert password_stats["concluidas"] >= 1
+    assert password_stats["latencia_media_ms"] > 0
+
+
+def test_get_metrics_database_pool_success(client):
+    response = client.get("/metricas/")
+    assert response.status_code == HTTPStatus.OK
+    assert "pool" in response.json()["banco"]
+
+
+def test_get_metrics_entity_cache_success(client, book1):
+    hit_ratio = 0.5  # um miss e um acerto
+    client.get(f"livro/{book1.id}")
+    client.get(f"livro/{book1.id}")
+    response = client.get("/metricas/")
+    book_stats = response.json()["cache_livros"]
+    assert book_stats["tamanho"] == 1
+    assert book_stats["taxa_acerto"] == hit_ratio
+    assert "cache_romancistas" in response.json()
@@ -1,7 +1,11 @@
+import json
 from http import HTTPStatus
 
 import pytest
+from sqlalchemy import event, func, select
 
+from mymadr.cache import novelist_cache
+from mymadr.models import Book
 from tests.factories import BookFactory
 
 
@@ -37,6 +41,117 @@ def test_get_novelist_by_id_success(client, novelist):
     assert response.json() == json_output
 
 
+def test_get_novelist_by_id_not_modified(client, novelist, token):
+    etag = client.get(f"/romancista/{novelist.id}").headers["ETag"]
+    response = client.get(
+        f"/romancista/{novelist.id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    client.patch(
+        f"/romancista/{novelist.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"nome": "novo nome"},
+    )
+    response = client.get(
+        f"/romancista/{novelist.id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_query_novelists_not_modified(client, novelist):
+    etag = client.get("/romancista/").headers["ETag"]
+    response = client.get("/romancista/", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_query_novelist_books_success(client, novelist, book1, book2, book3):
+    response = client.get(f"/romancista/{novelist.id}/livros?tamanho=1")
+    assert response.status_code == HTTPStatus.OK
+    first_page = response.json()
+    assert [book["id"] for book in first_page["livros"]] == [book1.id]
+    assert first_page["has_more"] is True
+    response = client.get(
+        f"/romancista/{novelist.id}/livros",
+        params={"tamanho": 1, "cursor": first_page["proximo"]},
+    )
+    assert [book["id"] for book in response.json()["livros"]] == [book2.id]
+    assert response.json()["has_more"] is False
+
+
+def test_query_novelist_books_without_books_empty(client, other_novelist):
+    response = client.get(f"/romancista/{other_novelist.id}/livros")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["livros"] == []
+
+
+def test_query_novelist_books_when_novelist_does_not_exist_not_found(
+    client, novelist
+):
+    response = client.get(f"/romancista/{novelist.id + 1}/livros")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {"message": "Romancista não consta no MADR"}
+
+
+def test_get_novelist_with_stats_success(client, novelist, book1, book2):
+    response = client.get(f"/romancista/{novelist.id}?estatisticas=true")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "nome": novelist.name,
+        "id": novelist.id,
+        "total_livros": 2,
+        "primeiro_ano": book2.year,
+        "ultimo_ano": book1.year,
+    }
+    assert "Last-Modified" not in response.headers
+
+
+def test_get_novelist_stats_etag_follows_books(client, novelist, token):
+    url = f"/romancista/{novelist.id}?estatisticas=true"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url).json()["total_livros"] == 0
+    client.post(
+        "livro/",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"titulo": "livro", "ano": 2000, "romancista_id": novelist.id},
+    )
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["total_livros"] == 1
+
+
+def test_get_novelist_from_replica_is_not_cached(client, session, novelist):
+    session.info["replica"] = True
+    response = client.get(f"romancista/{novelist.id}")
+    assert response.status_code == HTTPStatus.OK
+    assert novelist_cache.stats()["tamanho"] == 0
+
+
+def test_update_novelist_invalidates_cache(client, novelist, token):
+    client.get(f"/romancista/{novelist.id}")
+    client.patch(
+        f"/romancista/{novelist.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"nome": "novo nome"},
+    )
+    response = client.get(f"/romancista/{novelist.id}")
+    assert response.json() == {"nome": "novo nome", "id": novelist.id}
+
+
+def test_delete_novelist_invalidates_cached_books(
+    client, novelist, book1, token
+):
+    client.get(f"/romancista/{novelist.id}")
+    client.get(f"livro/{book1.id}")
+    client.delete(
+        f"/romancista/{novelist.id}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    response = client.get(f"/romancista/{novelist.id}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.get(f"livro/{book1.id}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_get_novelist_by_id_when_novelist_does_not_exist_not_found(
     client, novelist
 ):
@@ -50,7 +165,11 @@ def test_query_novelist_by_partial_name_success(client, novelist):
     response = client.get(f"romancista/?name={partial_name}")
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {
-        "romancistas": [{"nome": novelist.name, "id": novelist.id}]
+        "romancistas": [{"nome": novelist.name, "id": novelist.id}],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
     }
 
 
@@ -64,17 +183,55 @@ def test_query_novelists_by_partial_name_success(
         "romancistas": [
             {"nome": novelist.name, "id": novelist.id},
             {"nome": other_novelist.name, "id": other_novelist.id},
-        ]
+        ],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
     }
 
 
+def test_query_novelists_sorted_by_name_descending(
+    client, novelist, other_novelist
+):
+    response = client.get("romancista/", params={"ordenar": "-nome"})
+    assert response.status_code == HTTPStatus.OK
+    assert [item["id"] for item in response.json()["romancistas"]] == [
+        other_novelist.id,
+        novelist.id,
+    ]
+
+
+def test_query_novelists_sorted_pages_by_name(
+    client, novelist, other_novelist
+):
+    params = {"ordenar": "-nome", "tamanho": 1}
+    first_page = client.get("romancista/", params=params).json()
+    params["cursor"] = first_page["proximo"]
+    second_page = client.get("romancista/", params=params).json()
+    assert first_page["romancistas"][0]["id"] == other_novelist.id
+    assert second_page["romancistas"][0]["id"] == novelist.id
+    assert second_page["has_more"] is False
+
+
+def test_query_novelists_invalid_order_unprocessable(client):
+    response = client.get("romancista/", params={"ordenar": "ano"})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 def test_query_novelists_no_matches_returns_empty_list(
     client, novelist, other_novelist
 ):
     name = "monteiro"
     response = client.get(f"romancista/?nome={name}")
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {"romancistas": []}
+    assert response.json() == {
+        "romancistas": [],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+    }
 
 
 def test_update_novelist_sucess(client, novelist, token):
@@ -157,6 +314,17 @@ def test_delete_novelist_success(client, novelist, token):
     assert response.json() == {"message": "Romancista deletado no MADR"}
 
 
+def test_delete_novelist_when_novelist_does_not_exist_not_found(
+    client, novelist, token
+):
+    response = client.delete(
+        f"romancista/{novelist.id + 1}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {"message": "Romancista não consta no MADR"}
+
+
 def test_delete_novelist_not_authenticated_unauthorized(client, novelist):
     response = client.delete(
         f"romancista/{novelist.id}",
@@ -211,7 +379,14 @@ async def test_delete_novelist_also_deletes_their_books_success(
     # verify if books were deleted
     response = client.get(f"livro/?romancista_id={novelist.id}")
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {"livros": []}
+    assert response.json() == {
+        "livros": [],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
+    }
     # verify if books by other novelist
     response = client.get(f"livro/?romancista_id={other_novelist.id}")
     assert response.status_code == HTTPStatus.OK
@@ -244,3 +419,85 @@ def test_novelist_name_sanitization_on_update(client, token, novelist):
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json() == json_output
+
+
+def test_register_novelists_batch_success(client, novelist, token):
+    response = client.post(
+        "/romancista/lote",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "romancistas": [
+                {"nome": "Clarice  Lispector"},
+                {"nome": novelist.name},
+                {"nome": "clarice lispector"},
+            ]
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()["resultados"]
+    assert [result["status"] for result in results] == [
+        "criado",
+        "existente",
+        "existente",
+    ]
+    assert results[1]["id"] == novelist.id
+    assert results[0]["id"] == results[2]["id"]
+    response = client.get("/romancista/", params={"nome": "clarice"})
+    assert len(response.json()["romancistas"]) == 1
+
+
+def test_register_novelists_batch_not_authenticated_unauthorized(client):
+    response = client.post(
+        "/romancista/lote", json={"romancistas": [{"nome": "clarice"}]}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_register_novelists_batch_empty_unprocessable(client, token):
+    response = client.post(
+        "/romancista/lote",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"romancistas": []},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_export_novelists_ndjson(client, novelist, other_novelist):
+    response = client.get("/romancista/export")
+    assert response.status_code == HTTPStatus.OK
+    assert response.text.splitlines() == [
+        json.dumps({"id": novelist.id, "nome": novelist.name}),
+        json.dumps({"id": other_novelist.id, "nome": other_novelist.name}),
+    ]
+
+
+def test_export_novelists_invalid_format_unprocessable(client):
+    response = client.get("/romancista/export", params={"formato": "xml"})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_delete_novelist_is_a_single_statement(
+    session, client, engine, novelist, token
+):
+    session.add_all(BookFactory.create_batch(50, novelist_id=novelist.id))
+    await session.commit()
+    statements = []
+
+    def track(conn, cursor, statement, *args):
+        if statement.startswith("DELETE"):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", track)
+    try:
+        response = client.delete(
+            f"romancista/{novelist.id}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", track)
+    assert response.status_code == HTTPStatus.OK
+    assert len(statements) == 1
+    assert "FROM novelists" in statements[0]
+    remaining = await session.scalar(select(func.count(Book.id)))
+    assert remaining == 0
@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.database import build_engine
+from mymadr.models import Book, Novelist, table_registry
+from mymadr.pagination import (
+    SortKey,
+    count_total,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    page,
+)
+from tests.factories import BookFactory
+
+KEYS = (SortKey(Book.year, descending=True), SortKey(Book.id))
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor([1899, 42])
+    assert decode_cursor(cursor, KEYS) == [1899, 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "???",
+        encode_cursor([1899]),
+        encode_cursor(["1899", 42]),
+        encode_cursor({"ano": 1899}),
+    ],
+)
+def test_decode_cursor_rejects_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, KEYS)
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_keyset_after_same_direction_uses_row_comparison():
+    condition = keyset_after((SortKey(Book.year), SortKey(Book.id)), [1, 2])
+    sql = str(select(Book.id).where(condition))
+    assert "(books.year, books.id) >" in sql
+
+
+def test_keyset_after_mixed_directions_expands_comparison():
+    sql = str(select(Book.id).where(keyset_after(KEYS, [1899, 42])))
+    assert "books.year <" in sql
+    assert "books.year =" in sql
+    assert "books.id >" in sql
+
+
+def test_page_returns_next_cursor_only_with_extra_row():
+    rows = [
+        Book(title=f"livro {i}", year=1900, novelist_id=1) for i in range(3)
+    ]
+    for i, row in enumerate(rows):
+        row.id = i + 1
+    page_size = 2
+    full = page("livros", rows, KEYS, page_size)
+    assert full["livros"] == rows[:page_size]
+    assert full["has_more"] is True
+    assert decode_cursor(full["proximo"], KEYS) == [1900, 2]
+    last = page("livros", rows[:page_size], KEYS, page_size)
+    assert last["has_more"] is False
+    assert last["proximo"] is None
+
+
+@pytest.mark.asyncio
+async def test_count_total_on_sqlite_reports_lower_bound(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(Novelist(name="machado de assis"))
+        session.add_all(BookFactory.create_batch(5))
+        await session.commit()
+        query = select(Book)
+        threshold = 3
+        assert await count_total(session, query, 10) == {
+            "total": 5,
+            "total_estimado": False,
+        }
+        assert await count_total(session, query, threshold) == {
+            "total": threshold + 1,
+            "total_estimado": True,
+        }
+        filtered = query.where(Book.id > threshold)
+        assert await count_total(session, filtered, threshold) == {
+            "total": 2,
+            "total_estimado": False,
+        }
+    await engine.dispose()
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import select
+
+from mymadr.models import RevokedToken
+from mymadr.revocation import BloomFilter, RevocationList
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert "never-added" not in bloom
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_skips_database_for_unknown_jti(session):
+    revocations = RevocationList(1000, 0.001, refresh_seconds=60)
+    assert not await revocations.is_revoked(session, "unknown")
+    assert revocations.stats()["consultas_banco"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_revoke_and_prune_expired(session):
+    now = datetime.now(tz=ZoneInfo("UTC"))
+    revocations = RevocationList(1000, 0.001, refresh_seconds=60)
+    await revocations.revoke(session, "old", now - timedelta(minutes=1))
+    await revocations.revoke(session, "new", now + timedelta(minutes=1))
+    assert await revocations.is_revoked(session, "new")
+    stored = await session.scalars(select(RevokedToken.jti))
+    assert stored.all() == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_loads_existing_entries(session):
+    expires_at = datetime.now(tz=ZoneInfo("UTC")) + timedelta(minutes=1)
+    session.add(RevokedToken(jti="revoked", expires_at=expires_at))
+    await session.commit()
+    revocations = RevocationList(1000, 0.001, refresh_seconds=60)
+    assert await revocations.is_revoked(session, "revoked")
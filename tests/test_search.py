@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mymadr.database import build_engine
+from mymadr.models import Book, Novelist, table_registry
+from mymadr.search import books_fts, escape_like, substring_filter
+
+
+def test_escape_like():
+    assert escape_like("100%_a\\b") == "100\\%\\_a\\\\b"
+
+
+@pytest.mark.asyncio
+async def test_postgres_title_search_uses_trigram_index(session, book1):
+    query = select(Book.id).where(
+        substring_filter(
+            "postgresql", Book.title, books_fts.c.title, Book.id, "casm"
+        )
+    )
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = await session.execute(
+        text(
+            f"EXPLAIN {query.compile(compile_kwargs={'literal_binds': True})}"
+        )
+    )
+    assert "ix_books_title_trgm" in "\n".join(plan.scalars())
+    await session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_title_search_uses_fts_table(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        novelist = Novelist(name="machado de assis")
+        session.add(novelist)
+        await session.flush()
+        session.add_all([
+            Book(title="dom casmurro", year=1899, novelist_id=novelist.id),
+            Book(title="100%_casmurro", year=1900, novelist_id=novelist.id),
+            Book(title="missa do galo", year=1893, novelist_id=novelist.id),
+        ])
+        await session.commit()
+
+        async def search(value):
+            condition = substring_filter(
+                "sqlite", Book.title, books_fts.c.title, Book.id, value
+            )
+            titles = await session.scalars(
+                select(Book.title).where(condition).order_by(Book.id)
+            )
+            return titles.all()
+
+        assert await search("casm") == ["dom casmurro", "100%_casmurro"]
+        assert await search("%_") == ["100%_casmurro"]
+
+        # triggers mantêm a tabela FTS em sincronia
+        book = await session.scalar(
+            select(Book).where(Book.title == "missa do galo")
+        )
+        book.title = "memórias póstumas"
+        await session.commit()
+        assert await search("galo") == []
+        assert await search("póstu") == ["memórias póstumas"]
+        await session.delete(book)
+        await session.commit()
+        assert await search("póstu") == []
+
+        plan = await session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT rowid FROM books_fts "
+                "WHERE title LIKE '%casm%'"
+            )
+        )
+        assert "VIRTUAL TABLE INDEX" in str(plan.all())
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await engine.dispose()
+
+
+def test_query_book_by_title_with_wildcard_matches_literally(
+    client, book1, book2
+):
+    response = client.get("/livro/", params={"titulo": "%"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "livros": [],
+        "proximo": None,
+        "has_more": False,
+        "total": None,
+        "total_estimado": None,
+        "facetas": None,
+    }
@@ -1,14 +1,22 @@
+import asyncio
 from http import HTTPStatus
+from time import sleep
 
 import pytest
 from fastapi import HTTPException
 from jwt import decode
 
 from mymadr.security import (
+    PasswordHashPool,
     create_access_token,
+    decode_token,
     get_current_user,
     get_password_hash,
+    get_password_hash_async,
+    payload_cache,
+    principal_cache,
     verify_password,
+    verify_password_async,
 )
 from mymadr.settings import settings
 
@@ -21,6 +29,22 @@ def test_jwt_success():
     )
     assert decoded["test"] == data["test"]
     assert "exp" in decoded
+    assert "jti" in decoded
+
+
+def test_jwt_jti_is_unique():
+    data = {"sub": "test@test"}
+    first = decode_token(create_access_token(data))
+    second = decode_token(create_access_token(data))
+    assert first["jti"] != second["jti"]
+
+
+def test_decode_token_memoizes_payload():
+    token = create_access_token({"sub": "test@test"})
+    first = decode_token(token)
+    second = decode_token(token)
+    assert first is second
+    assert payload_cache.stats()["acertos"] == 1
 
 
 def test_jwt_invalid_token(client, user):
@@ -62,7 +86,65 @@ async def test_current_user_exception_no_username_unauthorized(session):
     assert exc.value.detail == "Não autorizado"
 
 
+@pytest.mark.asyncio
+async def test_get_current_user_uses_principal_cache(session, user):
+    token = create_access_token({"sub": user.email})
+    first = await get_current_user(session, token)
+    second = await get_current_user(session, token)
+    assert first.id == second.id == user.id
+    assert principal_cache.stats()["acertos"] == 1
+    assert principal_cache.stats()["falhas"] == 1
+
+
+def test_principal_cache_invalidated_on_update(client, user, token):
+    client.put(
+        f"/conta/{user.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"email": "changed@mail.com"},
+    )
+    # token antigo aponta para o email anterior, não pode vir do cache
+    response = client.put(
+        f"/conta/{user.id}",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"username": "changed"},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_principal_cache_invalidated_on_delete(client, user, token):
+    client.delete(
+        f"/conta/{user.id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    response = client.delete(
+        f"/conta/{user.id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 def test_password_success():
     password = "password123"
     hashed_password = get_password_hash(password)
     assert verify_password(password, hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_password_async_success():
+    password = "password123"
+    hashed_password = await get_password_hash_async(password)
+    assert await verify_password_async(password, hashed_password)
+    assert not await verify_password_async("wrong", hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_password_pool_when_saturated_service_unavailable():
+    pool = PasswordHashPool(kind="thread", workers=1, queue_size=0)
+    busy = asyncio.create_task(pool.run(sleep, 0.2))
+    await asyncio.sleep(0)  # deixa a primeira chamada ocupar a vaga
+    with pytest.raises(HTTPException) as exc:
+        await pool.run(sleep, 0)
+    await busy
+    pool.shutdown()
+    assert exc.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert exc.value.detail == "Serviço sobrecarregado, tente novamente"
+    assert pool.stats()["rejeitadas"] == 1
+    assert pool.stats()["concluidas"] == 1
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import delete, insert, select, text, update
+
+from mymadr.database import build_engine
+from mymadr.models import Book, Novelist, table_registry
+from mymadr.stats import RECOMPUTE_NOVELIST_STATS
+
+OLDEST, MIDDLE, RECENT, NEWEST = 1880, 1900, 1910, 1920
+
+
+async def _stats(conn, novelist_id):
+    row = await conn.execute(
+        select(
+            Novelist.book_count, Novelist.first_year, Novelist.last_year
+        ).where(Novelist.id == novelist_id)
+    )
+    return tuple(row.one())
+
+
+async def _check_stats_triggers(engine):
+    async with engine.begin() as conn:
+        first = await conn.scalar(
+            insert(Novelist).values(name="a").returning(Novelist.id)
+        )
+        second = await conn.scalar(
+            insert(Novelist).values(name="b").returning(Novelist.id)
+        )
+        assert await _stats(conn, first) == (0, None, None)
+
+        await conn.execute(
+            insert(Book),
+            [
+                {"title": "um", "year": MIDDLE, "novelist_id": first},
+                {"title": "dois", "year": OLDEST, "novelist_id": first},
+                {"title": "tres", "year": NEWEST, "novelist_id": first},
+            ],
+        )
+        assert await _stats(conn, first) == (3, OLDEST, NEWEST)
+
+        await conn.execute(
+            update(Book).where(Book.year == NEWEST).values(year=RECENT)
+        )
+        assert await _stats(conn, first) == (3, OLDEST, RECENT)
+
+        await conn.execute(
+            update(Book).where(Book.year == OLDEST).values(novelist_id=second)
+        )
+        assert await _stats(conn, first) == (2, MIDDLE, RECENT)
+        assert await _stats(conn, second) == (1, OLDEST, OLDEST)
+
+        await conn.execute(delete(Book).where(Book.year == RECENT))
+        await conn.execute(update(Book).values(title="outro"))
+        assert await _stats(conn, first) == (1, MIDDLE, MIDDLE)
+
+        await conn.execute(delete(Book).where(Book.novelist_id == second))
+        assert await _stats(conn, second) == (0, None, None)
+
+        await conn.execute(update(Novelist).values(book_count=99))
+        await conn.execute(text(RECOMPUTE_NOVELIST_STATS))
+        assert await _stats(conn, first) == (1, MIDDLE, MIDDLE)
+        assert await _stats(conn, second) == (0, None, None)
+
+
+@pytest.mark.asyncio
+async def test_postgres_stats_triggers(session, engine):
+    await _check_stats_triggers(engine)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_stats_triggers(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'madr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    await _check_stats_triggers(engine)
+    await engine.dispose()
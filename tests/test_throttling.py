@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from pydantic import ValidationError
+
+from mymadr.settings import Settings
+from mymadr.throttling import TokenBucketLimiter, login_email_limiter
+
+
+def test_token_bucket_rejects_after_capacity():
+    limiter = TokenBucketLimiter(rate=2, period=60, max_keys=10)
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") > 0
+    assert limiter.hit("b") == 0
+    assert limiter.stats()["rejeitadas"] == 1
+
+
+def test_token_bucket_disabled_when_rate_is_zero():
+    limiter = TokenBucketLimiter(rate=0, period=60, max_keys=10)
+    for _ in range(5):
+        assert limiter.hit("a") == 0
+
+
+def test_token_bucket_requires_positive_period():
+    with pytest.raises(ValueError, match="período"):
+        TokenBucketLimiter(rate=1, period=0, max_keys=10)
+
+
+@pytest.mark.parametrize(
+    "setting",
+    [
+        "LOGIN_RATE_LIMIT_PER_EMAIL",
+        "LOGIN_RATE_LIMIT_PER_IP",
+        "LOGIN_RATE_LIMIT_PERIOD_SECONDS",
+        "LOGIN_RATE_LIMIT_MAX_KEYS",
+    ],
+)
+def test_login_rate_limit_settings_must_be_positive(setting):
+    with pytest.raises(ValidationError):
+        Settings(**{setting: 0})
+
+
+def test_token_bucket_evicts_old_keys():
+    max_keys = 2
+    limiter = TokenBucketLimiter(rate=1, period=60, max_keys=max_keys)
+    limiter.hit("a")
+    limiter.hit("b")
+    limiter.hit("c")
+    assert limiter.stats()["chaves"] == max_keys
+
+
+def test_login_too_many_attempts_per_email(client, user):
+    for _ in range(login_email_limiter.capacity):
+        response = client.post(
+            "/token", data={"username": user.email, "password": "wrong"}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+    response = client.post(
+        "/token",
+        data={"username": user.email, "password": user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {
+        "message": "Muitas tentativas de login, aguarde"
+    }
+    assert int(response.headers["Retry-After"]) >= 1